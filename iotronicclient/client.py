@@ -10,9 +10,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+
 from keystoneauth1 import loading as kaloading
 from oslo_utils import importutils
 
+from iotronicclient.common import endpoints
+from iotronicclient.common import filecache
 from iotronicclient.common.i18n import _
 from iotronicclient import exc
 
@@ -27,12 +31,19 @@ def get_client(api_version, os_auth_token=None, iotronic_url=None,
                insecure=None, timeout=None, os_cacert=None, ca_file=None,
                os_cert=None, cert_file=None, os_key=None, key_file=None,
                os_iotronic_api_version=None, max_retries=None,
-               retry_interval=None, session=None, **ignored_kwargs):
+               retry_interval=None, session=None, connect_timeout=None,
+               deadline=None, retry_policy=None, circuit_breaker=None,
+               hedging=None, wire_format=None, compression=None,
+               discover_version=False, pool_connections=None,
+               pool_maxsize=None, pool_block=False, keepalive=True,
+               tcp_keepalive=None, log_sample_rate=None, log_body_max=None,
+               token_cache=False, catalog_cache=None, **ignored_kwargs):
     """Get an authenticated client, based on the credentials.
 
     :param api_version: the API version to use. Valid value: '1'.
     :param os_auth_token: pre-existing token to re-use
-    :param iotronic_url: iotronic API endpoint
+    :param iotronic_url: iotronic API endpoint, or a list of the endpoints
+        of its replicas
     :param os_username: name of a user
     :param os_password: user's password
     :param os_auth_url: endpoint to authenticate against
@@ -60,9 +71,60 @@ def get_client(api_version, os_auth_token=None, iotronic_url=None,
     :param key_file: path to key file, deprecated in favour of os_key
     :param os_iotronic_api_version: iotronic API version to use
     :param max_retries: Maximum number of retries in case of conflict error
-    :param retry_interval: Amount of time (in seconds) between retries in case
-        of conflict error
+    :param retry_interval: Base amount of time (in seconds) between retries
+        in case of conflict error
+    :param retry_policy: iotronicclient.common.retry.RetryPolicy overriding
+        max_retries and retry_interval
+    :param circuit_breaker: True to guard the requests with the circuit
+        breaker shared by the clients of each endpoint, or a dict of
+        settings for them (see iotronicclient.common.circuit)
     :param session: Keystone session to use
+    :param connect_timeout: timeout (in seconds) for establishing the
+        connections to the iotronic API, defaults to 'timeout'. Only used
+        when os_auth_token and iotronic_url are given.
+    :param deadline: maximum time (in seconds) a single call may take,
+        including its retries, redirects and version negotiation
+    :param hedging: True to send a duplicate of the GET requests slower
+        than most recent ones, or a dict of settings for it (see
+        iotronicclient.common.hedging). Only used when os_auth_token and
+        iotronic_url are given.
+    :param wire_format: 'msgpack' to ask the API for MessagePack
+        responses, which are decoded faster than JSON; the JSON responses
+        of servers not supporting it are still accepted. Defaults to
+        'json'.
+    :param compression: True to gzip the request bodies of 1 KiB or more,
+        or a dict of settings (see iotronicclient.common.compression).
+        Only enable it when the API accepts compressed request bodies;
+        compressed responses are always accepted.
+    :param discover_version: when no API version is given nor cached,
+        fetch the version range of the server in the background, while
+        authenticating, and use the best version from the first request
+        instead of negotiating it after a 406 response
+    :param pool_connections: number of hosts whose connections are pooled.
+        Only used when os_auth_token and iotronic_url are given, as the
+        following connection settings.
+    :param pool_maxsize: maximum number of connections kept per host, size
+        it for the number of concurrent requests
+    :param pool_block: whether the requests wait for a connection when
+        pool_maxsize connections are in use, instead of opening a
+        connection that is discarded afterwards
+    :param keepalive: whether to reuse the connections between requests
+    :param tcp_keepalive: idle time (in seconds) after which TCP keep-alive
+        probes are sent, None to disable them
+    :param log_sample_rate: with DEBUG logging enabled, log 1 request in
+        log_sample_rate. Defaults to 1, every request is logged. Only used
+        when os_auth_token and iotronic_url are given, as log_body_max.
+    :param log_body_max: maximum number of characters of a request or
+        response body that are logged, 0 to log them in full. Defaults to
+        4096.
+    :param token_cache: whether to keep the token and service catalog
+        obtained with the Keystone credentials in a file, readable only
+        by the user, and reuse them until shortly before the token
+        expires. Not used when a session is given.
+    :param catalog_cache: when iotronic_url is not given, True to reuse the
+        endpoint found in the service catalog for the same token scope,
+        service type, interface and region during 5 minutes, or a dict of
+        settings, or a cache (see iotronicclient.common.endpoints).
     :param ignored_kwargs: all the other params that are passed. Left for
         backwards compatibility. They are ignored.
     """
@@ -74,6 +136,12 @@ def get_client(api_version, os_auth_token=None, iotronic_url=None,
         'os_iotronic_api_version': os_iotronic_api_version,
         'max_retries': max_retries,
         'retry_interval': retry_interval,
+        'deadline': deadline,
+        'retry_policy': retry_policy,
+        'circuit_breaker': circuit_breaker,
+        'wire_format': wire_format,
+        'compression': compression,
+        'discover_version': discover_version,
     }
     endpoint = iotronic_url
     cacert = os_cacert or ca_file
@@ -87,6 +155,15 @@ def get_client(api_version, os_auth_token=None, iotronic_url=None,
             'cert_file': cert,
             'key_file': key,
             'timeout': timeout,
+            'connect_timeout': connect_timeout,
+            'hedging': hedging,
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block,
+            'keepalive': keepalive,
+            'tcp_keepalive': tcp_keepalive,
+            'log_sample_rate': log_sample_rate,
+            'log_body_max': log_body_max,
         })
     elif os_auth_url:
         auth_type = 'password'
@@ -113,6 +190,10 @@ def get_client(api_version, os_auth_token=None, iotronic_url=None,
         if not session:
             loader = kaloading.get_plugin_loader(auth_type)
             auth_plugin = loader.load_from_options(**auth_kwargs)
+            if token_cache:
+                token_cache = filecache.AuthStateCache(auth_plugin)
+                token_cache.load()
+                kwargs['token_cache'] = token_cache
             # Let keystoneauth do the necessary parameter conversions
             session = kaloading.session.Session().load_from_options(
                 auth=auth_plugin, insecure=insecure, cacert=cacert,
@@ -127,11 +208,17 @@ def get_client(api_version, os_auth_token=None, iotronic_url=None,
                 # Pass the endpoint, it will be used to get hostname
                 # and port that will be used for API version caching. It will
                 # be also set as endpoint_override.
-                endpoint = session.get_endpoint(
+                cache = endpoints.from_option(catalog_cache)
+                get_endpoint = (session.get_endpoint if cache is None else
+                                functools.partial(cache.get_endpoint,
+                                                  session))
+                endpoint = get_endpoint(
                     service_type=os_service_type,
                     interface=os_endpoint_type,
                     region_name=os_region_name
                 )
+                if kwargs.get('token_cache'):
+                    kwargs['token_cache'].save()
             except Exception as e:
                 raise exc.AmbiguousAuthSystem(
                     _('%(message)s, error was: %(error)s') %
@@ -0,0 +1,465 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+asyncio based HTTP client and managers for the Iotronic API.
+
+This module requires Python 3.6 or newer and the optional 'aiohttp'
+dependency, which can be installed with the 'aio' extra.
+"""
+
+import asyncio
+import functools
+import logging
+import ssl
+
+from oslo_utils import importutils
+from six.moves import http_client
+import six.moves.urllib.parse as urlparse
+
+from iotronicclient.common import circuit
+from iotronicclient.common import compression as comp
+from iotronicclient.common import http
+from iotronicclient.common.i18n import _
+from iotronicclient.common.i18n import _LE
+from iotronicclient.common import jsoncodec
+from iotronicclient.common import retry
+from iotronicclient import exc
+
+aiohttp = importutils.try_import('aiohttp')
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 100
+VERSION_HEADER = 'X-OpenStack-Iotronic-API-Version'
+
+_PAGES_DONE = object()
+
+
+def with_retries(func):
+    """Wrapper for AsyncHTTPClient._http_request adding support for retries.
+
+    Same as :func:`iotronicclient.common.http.with_retries`, but the
+    client waits between attempts without blocking the event loop.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, url, method, **kwargs):
+        policy = self.retry_policy
+        deadline = kwargs.get('deadline')
+        idempotency_key = (kwargs.get('headers') or {}).get(
+            retry.IDEMPOTENCY_KEY_HEADER)
+        num_attempts = policy.max_retries + 1
+        policy.record_request()
+        for attempt in range(1, num_attempts + 1):
+            http.check_deadline(deadline, url)
+            try:
+                with circuit.watch(self.circuit_breaker):
+                    return await func(self, url, method, **kwargs)
+            except http._RETRY_EXCEPTIONS as error:
+                msg = (_LE("Error contacting Iotronic server: %(error)s. "
+                           "Attempt %(attempt)d of %(total)d") %
+                       {'attempt': attempt,
+                        'total': num_attempts,
+                        'error': error})
+                if attempt == num_attempts:
+                    LOG.error(msg)
+                    raise
+                if not policy.is_retriable(method, error, idempotency_key):
+                    LOG.debug("%s. Not retrying the %s request, it may "
+                              "have been processed.", msg, method)
+                    raise
+                if not policy.allow_retry():
+                    LOG.error(_LE("%s. Retry budget exhausted, giving up."),
+                              msg)
+                    raise
+                LOG.debug(msg)
+                delay = policy.get_delay(attempt, error)
+                http.check_deadline(deadline, url, needed=delay)
+                await asyncio.sleep(delay)
+
+    return wrapper
+
+
+class Response(object):
+    """A fully read HTTP response.
+
+    Exposes the subset of the `requests.Response` interface used by the
+    managers and by :func:`iotronicclient.exc.from_response`.
+    """
+
+    def __init__(self, status_code, reason, headers, content):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return jsoncodec.loads(self.content)
+
+
+class AsyncHTTPClient(http.VersionNegotiationMixin):
+    """HTTP client running on an asyncio event loop.
+
+    All the connections are taken from a single pool, bounded by
+    'max_connections' (and 'max_connections_per_host' if set), so one
+    event loop can drive thousands of concurrent requests.
+
+    The token is either given with 'token' or obtained from the keystone
+    'session'; the keystone session is only used for authentication, the
+    requests themselves are sent by aiohttp.
+    """
+
+    def __init__(self, endpoint, token=None, session=None,
+                 os_iotronic_api_version=http.DEFAULT_VER,
+                 api_version_select_state='default',
+                 max_retries=http.DEFAULT_MAX_RETRIES,
+                 retry_interval=http.DEFAULT_RETRY_INTERVAL,
+                 retry_policy=None, circuit_breaker=None,
+                 timeout=http.DEFAULT_TIMEOUT,
+                 connect_timeout=None, deadline=None, ca_file=None,
+                 cert_file=None, key_file=None, insecure=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host=0, wire_format=None,
+                 compression=None):
+        if aiohttp is None:
+            raise exc.ClientException(
+                _("The asyncio client requires the 'aiohttp' library, "
+                  "install python-iotronicclient with the 'aio' extra."))
+
+        parts = urlparse.urlparse(endpoint)
+        if parts.scheme not in http.SUPPORTED_ENDPOINT_SCHEME:
+            msg = _('Unsupported scheme: %s') % parts.scheme
+            raise exc.EndpointException(msg)
+
+        self.endpoint = endpoint
+        self.endpoint_trimmed = http._trim_endpoint_api_version(endpoint)
+        self.auth_token = token
+        self.keystone_session = session
+        self.os_iotronic_api_version = os_iotronic_api_version
+        self.api_version_select_state = api_version_select_state
+        self.retry_policy = retry.get_policy(max_retries, retry_interval,
+                                             retry_policy)
+        self.circuit_breaker = circuit.from_option(endpoint, circuit_breaker)
+        read_timeout = timeout or http.DEFAULT_TIMEOUT
+        self.timeout = (float(connect_timeout or read_timeout),
+                        float(read_timeout))
+        self.deadline = deadline
+        self.accept = http.get_accept_header(wire_format)
+        # NOTE: aiohttp decompresses the responses without telling their
+        # size on the wire, only the request bodies are accounted
+        self.compression = comp.from_option(compression)
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+
+        self.ssl = True
+        if parts.scheme == 'https':
+            if insecure is True:
+                self.ssl = False
+            else:
+                self.ssl = ssl.create_default_context(cafile=ca_file)
+                if cert_file:
+                    self.ssl.load_cert_chain(cert_file, key_file)
+
+        self.session = None
+
+    def _get_session(self):
+        # NOTE: aiohttp sessions must be created from within the event loop
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ssl=self.ssl)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._client_timeout())
+        return self.session
+
+    def _client_timeout(self, deadline=None):
+        connect, read = self.timeout
+        total = None
+        if deadline is not None:
+            total = max(deadline.leftover(), 0.001)
+        return aiohttp.ClientTimeout(total=total, sock_connect=connect,
+                                     sock_read=read)
+
+    async def close(self):
+        """Close all the connections of the pool."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _get_token(self):
+        if self.keystone_session is None:
+            return self.auth_token
+        # NOTE: keystoneauth is blocking, the token is cached by the auth
+        # plugin so this only hits keystone when the token has to be renewed
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None,
+                                          self.keystone_session.get_token)
+
+    def _make_connection_url(self, url):
+        return urlparse.urljoin(self.endpoint_trimmed, url)
+
+    def _parse_version_headers(self, resp):
+        return self._generic_parse_version_headers(resp.headers.get)
+
+    def compression_stats(self):
+        """Return the bodies compressed and the bytes saved, if enabled."""
+        return self.compression.stats() if self.compression else {}
+
+    async def _make_simple_request(self, conn, method, url, deadline=None):
+        try:
+            async with conn.request(
+                    method, self._make_connection_url(url),
+                    timeout=self._client_timeout(deadline)) as resp:
+                content = await resp.read()
+                return Response(resp.status, resp.reason, resp.headers,
+                                content)
+        except asyncio.TimeoutError:
+            http.check_deadline(deadline, url)
+            raise
+
+    async def negotiate_version(self, conn, resp, deadline=None):
+        """Negotiate the server version
+
+        Same as :meth:`VersionNegotiationMixin.negotiate_version`, the
+        version range is requested from the server without blocking the
+        event loop.
+
+        param conn: An aiohttp client session
+        param resp: The response object from http request
+        param deadline: The deadline of the call, bounding the request of
+                        the supported version range
+        """
+        self._check_version_select_state()
+        min_ver, max_ver = self._parse_version_headers(resp)
+        if not max_ver:
+            LOG.debug('No version header in response, requesting from server')
+            resp = await self._make_simple_request(conn, 'GET',
+                                                   self._base_version_url(),
+                                                   deadline=deadline)
+            min_ver, max_ver = self._parse_version_headers(resp)
+        return self._select_negotiated_version(min_ver, max_ver)
+
+    @with_retries
+    async def _http_request(self, url, method, **kwargs):
+        """Send an http request with the specified characteristics.
+
+        :returns: a fully read :class:`Response`.
+        """
+        deadline = kwargs.get('deadline')
+        headers = dict(kwargs.get('headers') or {})
+        headers.setdefault('User-Agent', http.USER_AGENT)
+        if self.os_iotronic_api_version:
+            headers.setdefault(VERSION_HEADER, self.os_iotronic_api_version)
+        token = await self._get_token()
+        if token:
+            headers.setdefault('X-Auth-Token', token)
+
+        body = kwargs.get('body')
+        conn_url = self._make_connection_url(url)
+        session = self._get_session()
+        try:
+            async with session.request(
+                    method, conn_url, data=body, headers=headers,
+                    timeout=self._client_timeout(deadline)) as raw:
+                content = await raw.read()
+                resp = Response(raw.status, raw.reason, raw.headers, content)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if isinstance(e, asyncio.TimeoutError):
+                http.check_deadline(deadline, conn_url)
+            message = (_("Error has occurred while handling "
+                         "request for %(url)s: %(e)s") %
+                       dict(url=conn_url, e=e))
+            if isinstance(e, aiohttp.InvalidURL):
+                raise exc.ValidationError(message)
+
+            error = exc.ConnectionRefused(message)
+            error.request_sent = not isinstance(
+                e, aiohttp.ClientConnectorError)
+            raise error
+
+        if resp.status_code == http_client.NOT_ACCEPTABLE:
+            negotiated_ver = await self.negotiate_version(session, resp,
+                                                          deadline=deadline)
+            kwargs['headers'] = dict(headers)
+            kwargs['headers'][VERSION_HEADER] = negotiated_ver
+            return await self._http_request(url, method, **kwargs)
+
+        if resp.status_code >= http_client.BAD_REQUEST:
+            raise http.ErrorEnvelope.from_response(resp).to_exception(
+                resp, method, url)
+        elif resp.status_code == http_client.MULTIPLE_CHOICES:
+            raise exc.from_response(resp, method=method, url=url)
+
+        return resp
+
+    async def json_request(self, method, url, **kwargs):
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Content-Type', 'application/json')
+        kwargs['headers'].setdefault('Accept', self.accept)
+        kwargs['deadline'] = http.start_deadline(
+            kwargs.get('deadline', self.deadline))
+        http.add_idempotency_key(self.retry_policy, method,
+                                 kwargs['headers'])
+
+        if 'body' in kwargs:
+            kwargs['body'] = jsoncodec.dumps(kwargs['body'])
+        if self.compression is not None:
+            self.compression.add_headers(kwargs['headers'])
+            if 'body' in kwargs:
+                kwargs['body'] = self.compression.compress(kwargs['body'],
+                                                           kwargs['headers'])
+
+        resp = await self._http_request(url, method, **kwargs)
+        content_type = resp.headers.get('Content-Type')
+
+        if (resp.status_code in (
+                http_client.NO_CONTENT,
+                http_client.RESET_CONTENT) or content_type is None):
+            return resp, list()
+
+        body = http.decode_body(resp)
+
+        return resp, body
+
+    async def raw_request(self, method, url, **kwargs):
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Content-Type',
+                                     'application/octet-stream')
+        kwargs['deadline'] = http.start_deadline(
+            kwargs.get('deadline', self.deadline))
+        http.add_idempotency_key(self.retry_policy, method,
+                                 kwargs['headers'])
+        return await self._http_request(url, method, **kwargs)
+
+
+class AsyncManagerMixin(object):
+    """Turns a :class:`base.Manager` into one whose calls are coroutines.
+
+    Mixed in front of a synchronous manager, the public methods of the
+    latter keep their argument handling and return the coroutines (or
+    asynchronous generators) built here, so they can be awaited.
+    """
+
+    async def _get(self, resource_id, fields=None):
+        resources = await self._list(self._get_path(resource_id, fields))
+        try:
+            return resources[0]
+        except IndexError:
+            return None
+
+    async def _get_as_dict(self, resource_id, fields=None):
+        resource = await self._get(resource_id, fields=fields)
+        if resource:
+            return resource.to_dict()
+        else:
+            return {}
+
+    async def _iter_pages(self, url):
+        while url:
+            resp, body = await self.api.json_request('GET', url)
+            yield body
+            url = self._next_url(body)
+
+    async def _iter_pages_prefetch(self, url, depth):
+        pages = asyncio.Queue(maxsize=depth)
+
+        async def fetch(url):
+            try:
+                while url:
+                    resp, body = await self.api.json_request('GET', url)
+                    url = self._next_url(body)
+                    await pages.put((body, None))
+            except Exception as e:
+                await pages.put((None, e))
+            else:
+                await pages.put((_PAGES_DONE, None))
+
+        worker = asyncio.ensure_future(fetch(url))
+        try:
+            while True:
+                body, error = await pages.get()
+                if error is not None:
+                    raise error
+                if body is _PAGES_DONE:
+                    return
+                yield body
+        finally:
+            worker.cancel()
+
+    async def _iter_resources(self, url, response_key, obj_class, limit,
+                              prefetch):
+        if prefetch:
+            pages = self._iter_pages_prefetch(url, prefetch)
+        else:
+            pages = self._iter_pages(url)
+
+        object_count = 0
+        try:
+            async for body in pages:
+                data = self._format_body_data(body, response_key)
+                for obj in data:
+                    yield obj_class(self, obj, loaded=True)
+                    object_count += 1
+                    if limit and object_count >= limit:
+                        return
+        finally:
+            await pages.aclose()
+
+    def _iter_stream(self, url, response_key, obj_class, limit):
+        raise exc.ValidationError(
+            _("Streamed lists are not supported by the asyncio client"))
+
+    async def _list_pagination(self, url, response_key=None, obj_class=None,
+                               limit=None, prefetch=0):
+        return [obj async for obj in self._iter_pagination(
+            url, response_key=response_key, obj_class=obj_class, limit=limit,
+            prefetch=prefetch)]
+
+    async def _list(self, url, response_key=None, obj_class=None, body=None):
+        resp, body = await self.api.json_request('GET', url)
+
+        if obj_class is None:
+            obj_class = self.resource_class
+
+        data = self._format_body_data(body, response_key)
+        return [obj_class(self, res, loaded=True) for res in data if res]
+
+    async def _update(self, resource_id, patch, method='PATCH'):
+        url = self._path(resource_id)
+        resp, body = await self.api.json_request(method, url, body=patch)
+        # PATCH/PUT requests may not return a body
+        if body:
+            try:
+                return self.resource_class(self, body, loaded=True)
+            except Exception:
+                return body
+
+    async def _delete(self, resource_id):
+        await self.api.raw_request('DELETE', self._path(resource_id))
+
+
+class AsyncCreateManagerMixin(AsyncManagerMixin):
+    """Asynchronous counterpart of :class:`base.CreateManager`."""
+
+    async def create(self, **kwargs):
+        new = self._creation_body(kwargs)
+        url = self._path()
+        resp, body = await self.api.json_request('POST', url, body=new)
+        if body:
+            return self.resource_class(self, body, loaded=True)
@@ -21,8 +21,10 @@ Exception definitions.
 """
 
 
+from email import utils as email_utils
 import inspect
 import sys
+import time
 
 import six
 from six.moves import http_client
@@ -105,6 +107,24 @@ class AmbiguousEndpoints(EndpointException):
         self.endpoints = endpoints
 
 
+def _parse_retry_after(value):
+    """Return the number of seconds to wait from a Retry-After value.
+
+    The value is either a number of seconds or an HTTP-date; 0 is returned
+    when it is missing or invalid.
+    """
+    if value is None:
+        return 0
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        pass
+    date = email_utils.parsedate_tz(value)
+    if date is None:
+        return 0
+    return max(int(email_utils.mktime_tz(date) - time.time()), 0)
+
+
 class HttpError(ClientException):
     """The base exception class for all HTTP exceptions."""
     http_status = 0
@@ -112,7 +132,8 @@ class HttpError(ClientException):
 
     def __init__(self, message=None, details=None,
                  response=None, request_id=None,
-                 url=None, method=None, http_status=None):
+                 url=None, method=None, http_status=None,
+                 retry_after=None):
         self.http_status = http_status or self.http_status
         self.message = message or self.message
         self.details = details
@@ -120,6 +141,7 @@ class HttpError(ClientException):
         self.response = response
         self.url = url
         self.method = method
+        self.retry_after = _parse_retry_after(retry_after)
         formatted_string = "%s (HTTP %s)" % (self.message, self.http_status)
         if request_id:
             formatted_string += " (Request-ID: %s)" % request_id
@@ -292,14 +314,6 @@ class RequestEntityTooLarge(HTTPClientError):
     http_status = http_client.REQUEST_ENTITY_TOO_LARGE
     message = _("Request Entity Too Large")
 
-    def __init__(self, *args, **kwargs):
-        try:
-            self.retry_after = int(kwargs.pop('retry_after'))
-        except (KeyError, ValueError):
-            self.retry_after = 0
-
-        super(RequestEntityTooLarge, self).__init__(*args, **kwargs)
-
 
 class RequestUriTooLong(HTTPClientError):
     """HTTP 414 - Request-URI Too Long.
@@ -415,12 +429,15 @@ _code_map = dict(
 )
 
 
-def from_response(response, method, url):
+def from_response(response, method, url, error=None):
     """Returns an instance of :class:`HttpError` or subclass based on response.
 
     :param response: instance of `requests.Response` class
     :param method: HTTP method used for request
     :param url: URL used for request
+    :param error: optional, the error already decoded from the JSON or
+                  MessagePack body of the response, as a dict with its
+                  'message' and 'details'
     """
 
     req_id = response.headers.get("x-openstack-request-id")
@@ -438,9 +455,10 @@ def from_response(response, method, url):
         kwargs["retry_after"] = response.headers["retry-after"]
 
     content_type = response.headers.get("Content-Type", "")
-    if content_type.startswith("application/json"):
+    if content_type.startswith(("application/json",
+                                "application/x-msgpack")):
         try:
-            body = response.json()
+            body = {"error": error} if error is not None else response.json()
         except ValueError:
             pass
         else:
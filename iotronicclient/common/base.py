@@ -19,13 +19,22 @@ Base utilities to build API operation managers and objects on top of.
 
 import abc
 import copy
-import six
+import sys
+import threading
 
+import six
+from six.moves import queue
 import six.moves.urllib.parse as urlparse
 
 from iotronicclient.common.apiclient import base
+from iotronicclient.common.i18n import _
 from iotronicclient import exc
 
+# Maximum number of pages that can be fetched ahead of the consumer
+MAX_PREFETCH_DEPTH = 3
+_PREFETCH_POLL_INTERVAL = 0.1
+_PREFETCH_DONE = object()
+
 
 def getid(obj):
     """Wrapper to get  object's ID.
@@ -75,6 +84,12 @@ class Manager(object):
         :raises exc.ValidationError: For invalid resource_id arg value.
         """
 
+        try:
+            return self._list(self._get_path(resource_id, fields))[0]
+        except IndexError:
+            return None
+
+    def _get_path(self, resource_id, fields=None):
         if not resource_id:
             raise exc.ValidationError(
                 "The identifier argument is invalid. "
@@ -84,10 +99,7 @@ class Manager(object):
             resource_id = '%s?fields=' % resource_id
             resource_id += ','.join(fields)
 
-        try:
-            return self._list(self._path(resource_id))[0]
-        except IndexError:
-            return None
+        return self._path(resource_id)
 
     def _get_as_dict(self, resource_id, fields=None):
         """Retrieve a resource as a dictionary
@@ -117,16 +129,77 @@ class Manager(object):
 
         return data
 
-    def _list_pagination(self, url, response_key=None, obj_class=None,
-                         limit=None):
-        """Retrieve a list of items.
+    def _next_url(self, body):
+        url = body.get('next')
+        if url:
+            # NOTE(lucasagomes): We need to edit the URL to remove
+            # the scheme and netloc
+            url_parts = list(urlparse.urlparse(url))
+            url_parts[0] = url_parts[1] = ''
+            url = urlparse.urlunparse(url_parts)
+        return url
+
+    def _iter_pages(self, url):
+        """Fetch the pages of a list, one request at a time."""
+        while url:
+            resp, body = self.api.json_request('GET', url)
+            yield body
+            url = self._next_url(body)
 
-        The Iotronic API is configured to return a maximum number of
-        items per request, (see Iotronic's api.max_limit option). This
-        iterates over the 'next' link (pagination) in the responses,
-        to get the number of items specified by 'limit'. If 'limit'
-        is None this function will continue pagination until there are
-        no more values to be returned.
+    def _iter_pages_prefetch(self, url, depth):
+        """Fetch the pages of a list from a worker thread.
+
+        The worker follows the 'next' links while the consumer processes
+        the current page. At most 'depth' pages are queued ahead of the
+        consumer; once the queue is full the worker blocks until a page
+        is consumed. Errors are re-raised in the consumer thread.
+        """
+        pages = queue.Queue(maxsize=depth)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=_PREFETCH_POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    pass
+
+        def fetch(url):
+            try:
+                while url and not stop.is_set():
+                    resp, body = self.api.json_request('GET', url)
+                    url = self._next_url(body)
+                    put((body, None))
+            except Exception:
+                put((None, sys.exc_info()))
+            finally:
+                put((_PREFETCH_DONE, None))
+
+        worker = threading.Thread(target=fetch, args=(url,))
+        worker.daemon = True
+        worker.start()
+        try:
+            while True:
+                body, error = pages.get()
+                if error is not None:
+                    six.reraise(*error)
+                if body is _PREFETCH_DONE:
+                    return
+                yield body
+        finally:
+            # NOTE: also reached when the consumer stops early, the worker
+            # is then released from any pending put and exits.
+            stop.set()
+
+    def _iter_pagination(self, url, response_key=None, obj_class=None,
+                         limit=None, prefetch=0, stream=False):
+        """Iterate over a list of items, one page at a time.
+
+        Same as :meth:`_list_pagination`, but the resources are yielded
+        as soon as each page is received, and the 'next' link is only
+        followed once the current page has been consumed. Only one page
+        is held in memory at any time.
 
         :param url: a partial URL, e.g. '/boards'
         :param response_key: the key to be looked up in response
@@ -134,6 +207,15 @@ class Manager(object):
         :param obj_class: class for constructing the returned objects.
         :param limit: maximum number of items to return. If None returns
             everything.
+        :param prefetch: number of pages (up to MAX_PREFETCH_DEPTH) to
+            fetch in the background while the current page is consumed.
+            0 (the default) disables prefetching.
+        :param stream: whether to decode each page incrementally, while it
+            is received: the resources are then yielded one at a time and
+            only one of them is held in memory. Requires 'response_key',
+            and cannot be combined with 'prefetch'.
+        :raises exc.ValidationError: For an invalid prefetch value, or for
+            prefetch and stream given together.
 
         """
         if obj_class is None:
@@ -142,33 +224,83 @@ class Manager(object):
         if limit is not None:
             limit = int(limit)
 
-        object_list = []
+        prefetch = int(prefetch or 0)
+        if not 0 <= prefetch <= MAX_PREFETCH_DEPTH:
+            raise exc.ValidationError(
+                _("The prefetch depth must be between 0 and %(max)s. "
+                  "Value provided: %(value)s") %
+                {'max': MAX_PREFETCH_DEPTH, 'value': prefetch})
+
+        if stream:
+            if prefetch:
+                raise exc.ValidationError(
+                    _("The pages of a list cannot be both prefetched and "
+                      "streamed"))
+            return self._iter_stream(url, response_key, obj_class, limit)
+
+        return self._iter_resources(url, response_key, obj_class, limit,
+                                    prefetch)
+
+    def _iter_stream(self, url, response_key, obj_class, limit):
         object_count = 0
-        limit_reached = False
         while url:
-            resp, body = self.api.json_request('GET', url)
-            data = self._format_body_data(body, response_key)
-            for obj in data:
-                object_list.append(obj_class(self, obj, loaded=True))
-                object_count += 1
-                if limit and object_count >= limit:
-                    # break the for loop
-                    limit_reached = True
-                    break
-
-            # break the while loop and return
-            if limit_reached:
-                break
-
-            url = body.get('next')
-            if url:
-                # NOTE(lucasagomes): We need to edit the URL to remove
-                # the scheme and netloc
-                url_parts = list(urlparse.urlparse(url))
-                url_parts[0] = url_parts[1] = ''
-                url = urlparse.urlunparse(url_parts)
-
-        return object_list
+            resp, items = self.api.json_stream_request('GET', url,
+                                                       response_key)
+            try:
+                for obj in items:
+                    yield obj_class(self, obj, loaded=True)
+                    object_count += 1
+                    if limit and object_count >= limit:
+                        return
+            finally:
+                # NOTE: also reached when the consumer stops early, the
+                # rest of the response is then not read
+                items.close()
+            url = self._next_url(items.rest)
+
+    def _iter_resources(self, url, response_key, obj_class, limit,
+                        prefetch):
+        if prefetch:
+            pages = self._iter_pages_prefetch(url, prefetch)
+        else:
+            pages = self._iter_pages(url)
+
+        object_count = 0
+        try:
+            for body in pages:
+                data = self._format_body_data(body, response_key)
+                for obj in data:
+                    yield obj_class(self, obj, loaded=True)
+                    object_count += 1
+                    if limit and object_count >= limit:
+                        return
+        finally:
+            pages.close()
+
+    def _list_pagination(self, url, response_key=None, obj_class=None,
+                         limit=None, prefetch=0):
+        """Retrieve a list of items.
+
+        The Iotronic API is configured to return a maximum number of
+        items per request, (see Iotronic's api.max_limit option). This
+        iterates over the 'next' link (pagination) in the responses,
+        to get the number of items specified by 'limit'. If 'limit'
+        is None this function will continue pagination until there are
+        no more values to be returned.
+
+        :param url: a partial URL, e.g. '/boards'
+        :param response_key: the key to be looked up in response
+            dictionary, e.g. 'boards'
+        :param obj_class: class for constructing the returned objects.
+        :param limit: maximum number of items to return. If None returns
+            everything.
+        :param prefetch: number of pages to fetch in the background, see
+            :meth:`_iter_pagination`.
+
+        """
+        return list(self._iter_pagination(url, response_key=response_key,
+                                          obj_class=obj_class, limit=limit,
+                                          prefetch=prefetch))
 
     def _list(self, url, response_key=None, obj_class=None, body=None):
         resp, body = self.api.json_request('GET', url)
@@ -222,7 +354,13 @@ class CreateManager(Manager):
         :raises exc.InvalidAttribute: For invalid attributes that are not
                                       needed to create the resource.
         """
+        new = self._creation_body(kwargs)
+        url = self._path()
+        resp, body = self.api.json_request('POST', url, body=new)
+        if body:
+            return self.resource_class(self, body)
 
+    def _creation_body(self, kwargs):
         new = {}
         invalid = []
         for (key, value) in kwargs.items():
@@ -236,10 +374,7 @@ class CreateManager(Manager):
                 'needed to create %(resource)s.' %
                 {'resource': self._resource_name,
                  'attrs': '","'.join(invalid)})
-        url = self._path()
-        resp, body = self.api.json_request('POST', url, body=new)
-        if body:
-            return self.resource_class(self, body)
+        return new
 
 
 class Resource(base.Resource):
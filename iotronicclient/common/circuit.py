@@ -0,0 +1,245 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Client side circuit breakers, one per Iotronic API endpoint.
+
+While the breaker of an endpoint is open, the requests to that endpoint
+fail immediately with :class:`iotronicclient.exc.CircuitOpen` instead of
+adding load to an overloaded server. The state of all the breakers of the
+process is returned by :func:`get_states`.
+"""
+
+import collections
+import contextlib
+import logging
+import threading
+
+from keystoneauth1 import exceptions as kexc
+from oslo_utils import timeutils
+import six.moves.urllib.parse as urlparse
+
+from iotronicclient.common.i18n import _
+from iotronicclient.common.i18n import _LW
+from iotronicclient import exc
+
+LOG = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+DEFAULT_FAILURE_THRESHOLD = 0.5
+DEFAULT_MINIMUM_CALLS = 20
+DEFAULT_WINDOW_SIZE = 50
+DEFAULT_RESET_TIMEOUT = 30
+DEFAULT_HALF_OPEN_CALLS = 1
+
+# Errors telling that the server is unavailable or overloaded, 4xx
+# answers show a healthy server and are counted as successes
+_FAILURE_EXCEPTIONS = (exc.HttpServerError, exc.ConnectionError,
+                       kexc.ConnectionError)
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+class CircuitBreaker(object):
+    """Circuit breaker tracking the failure rate of an endpoint.
+
+    The breaker opens when, out of the last 'window_size' calls (and at
+    least 'minimum_calls'), the rate of failures reaches
+    'failure_threshold'. After 'reset_timeout' seconds it lets
+    'half_open_calls' trial calls through: if they succeed it closes
+    again, otherwise it re-opens.
+
+    :param name: the endpoint guarded by the breaker, for logging.
+    """
+
+    def __init__(self, name=None,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 minimum_calls=DEFAULT_MINIMUM_CALLS,
+                 window_size=DEFAULT_WINDOW_SIZE,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 half_open_calls=DEFAULT_HALF_OPEN_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = min(minimum_calls, window_size)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._results = collections.deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = None
+        self._trials = 0
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def _update_state(self):
+        if (self._state == OPEN and
+                timeutils.now() - self._opened_at >= self.reset_timeout):
+            self._state = HALF_OPEN
+            self._trials = 0
+            self._successes = 0
+
+    def _open(self):
+        if self._state != OPEN:
+            LOG.warning(_LW("Circuit breaker of %(name)s is now open, "
+                            "requests fail fast for %(timeout)s seconds"),
+                        {'name': self.name, 'timeout': self.reset_timeout})
+        self._state = OPEN
+        self._opened_at = timeutils.now()
+
+    def _close(self):
+        LOG.info("Circuit breaker of %s is now closed", self.name)
+        self._state = CLOSED
+        self._results.clear()
+
+    def retry_in(self):
+        """Seconds left before the open breaker lets a call through."""
+        with self._lock:
+            self._update_state()
+            if self._state != OPEN:
+                return 0
+            return max(self.reset_timeout -
+                       (timeutils.now() - self._opened_at), 0)
+
+    def before_call(self):
+        """Raise CircuitOpen if the call must not be attempted."""
+        with self._lock:
+            self._update_state()
+            if self._state == CLOSED:
+                return
+            if (self._state == HALF_OPEN and
+                    self._trials < self.half_open_calls):
+                self._trials += 1
+                return
+            state = self._state
+            retry_in = (self.reset_timeout -
+                        (timeutils.now() - self._opened_at)
+                        if state == OPEN else 0)
+        raise exc.CircuitOpen(
+            _("Circuit breaker of %(name)s is %(state)s, not sending the "
+              "request") % {'name': self.name, 'state': state},
+            endpoint=self.name, retry_in=max(retry_in, 0))
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._successes += 1
+                if self._successes >= self.half_open_calls:
+                    self._close()
+                return
+            self._results.append(False)
+
+    def release(self):
+        """Forget a call whose outcome does not count."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._results.append(True)
+            calls = len(self._results)
+            if (calls >= self.minimum_calls and
+                    sum(self._results) >= self.failure_threshold * calls):
+                self._open()
+
+    def stats(self):
+        """Return the state and the recent failure rate of the breaker."""
+        with self._lock:
+            self._update_state()
+            calls = len(self._results)
+            failures = sum(self._results)
+            return {
+                'state': self._state,
+                'calls': calls,
+                'failures': failures,
+                'failure_rate': float(failures) / calls if calls else 0.0,
+            }
+
+
+def _build_key(endpoint):
+    # NOTE: same key as the API version cache, see http.get_server
+    parts = urlparse.urlparse(endpoint or '')
+    return "%s:%s" % (parts.hostname, parts.port)
+
+
+def get_breaker(endpoint, **settings):
+    """Return the breaker shared by all the clients of an endpoint.
+
+    :param endpoint: the endpoint URL; only its host and port are used.
+    :param settings: arguments of :class:`CircuitBreaker`, only used when
+        the breaker of the endpoint is created.
+    """
+    key = _build_key(endpoint)
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            breaker = _BREAKERS[key] = CircuitBreaker(name=key, **settings)
+        return breaker
+
+
+def get_states():
+    """Return the stats of the breakers of the process, by host:port."""
+    with _BREAKERS_LOCK:
+        breakers = dict(_BREAKERS)
+    return dict((key, breaker.stats()) for key, breaker in breakers.items())
+
+
+def from_option(endpoint, circuit_breaker):
+    """Return the breaker selected by a client's 'circuit_breaker' option.
+
+    :param circuit_breaker: None or False to disable the breaker, True for
+        the shared breaker of the endpoint, a dict for the shared breaker
+        created with these settings, or a :class:`CircuitBreaker`.
+    """
+    if not circuit_breaker:
+        return None
+    if circuit_breaker is True:
+        return get_breaker(endpoint)
+    if isinstance(circuit_breaker, dict):
+        return get_breaker(endpoint, **circuit_breaker)
+    return circuit_breaker
+
+
+@contextlib.contextmanager
+def watch(breaker):
+    """Guard a request with 'breaker', which may be None."""
+    if breaker is None:
+        yield
+        return
+    breaker.before_call()
+    try:
+        yield
+    except _FAILURE_EXCEPTIONS:
+        breaker.record_failure()
+        raise
+    except exc.HttpError:
+        breaker.record_success()
+        raise
+    except BaseException:
+        # NOTE: errors raised by the client itself tell nothing about the
+        # health of the server
+        breaker.release()
+        raise
+    else:
+        breaker.record_success()
@@ -20,7 +20,6 @@ from __future__ import print_function
 
 import getpass
 import inspect
-import json
 import os
 import sys
 import textwrap
@@ -32,6 +31,7 @@ import six
 from six import moves
 
 from iotronicclient.common.i18n import _
+from iotronicclient.common import jsoncodec
 
 
 class MissingArgs(Exception):
@@ -195,7 +195,7 @@ def print_list(objs, fields, formatters=None, sortby_index=0,
             pt.add_row([r[1] for r in row])
 
     if json_flag:
-        print(json.dumps(json_array, indent=4, separators=(',', ': ')))
+        print(jsoncodec.dumps_pretty(json_array))
     elif six.PY3:
         print(encodeutils.safe_encode(pt.get_string(**kwargs)).decode())
     else:
@@ -213,7 +213,7 @@ def print_dict(dct, dict_property="Property", wrap=0, dict_value='Value',
     :param json_flag: print `dict` as JSON instead of table
     """
     if json_flag:
-        print(json.dumps(dct, indent=4, separators=(',', ': ')))
+        print(jsoncodec.dumps_pretty(dct))
         return
     pt = prettytable.PrettyTable([dict_property, dict_value])
     pt.align = 'l'
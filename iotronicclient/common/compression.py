@@ -0,0 +1,111 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Compression of the bodies exchanged with the Iotronic API.
+"""
+
+import gzip
+import io
+import threading
+
+ACCEPT_ENCODING = 'gzip, deflate'
+COMPRESSED_ENCODINGS = ('gzip', 'deflate')
+
+DEFAULT_THRESHOLD = 1024
+DEFAULT_LEVEL = 6
+
+
+class Compression(object):
+    """Compress the request bodies and account the bytes saved.
+
+    The responses are decompressed by the HTTP library, the client only
+    asks for them to be compressed and accounts their savings.
+
+    :param threshold: size (in bytes) from which the request bodies are
+        gzip compressed, None to never compress them. The server must
+        accept "Content-Encoding: gzip" request bodies.
+    :param level: gzip compression level, from 1 (fastest) to 9 (best).
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, level=DEFAULT_LEVEL):
+        self.threshold = threshold
+        self.level = level
+        self._stats = {
+            'requests_compressed': 0,
+            'request_bytes_saved': 0,
+            'responses_compressed': 0,
+            'response_bytes_saved': 0,
+        }
+        self._lock = threading.Lock()
+
+    def _record(self, direction, saved):
+        with self._lock:
+            self._stats['%ss_compressed' % direction] += 1
+            self._stats['%s_bytes_saved' % direction] += saved
+
+    def add_headers(self, headers):
+        headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+
+    def compress(self, body, headers):
+        """Return 'body' compressed if it is large enough.
+
+        :param body: the encoded request body.
+        :param headers: the request headers, 'Content-Encoding' is set
+            when the body is compressed.
+        """
+        if (self.threshold is None or body is None or
+                len(body) < self.threshold or
+                'Content-Encoding' in headers):
+            return body
+        buf = io.BytesIO()
+        with gzip.GzipFile(fileobj=buf, mode='wb',
+                           compresslevel=self.level, mtime=0) as f:
+            f.write(body)
+        compressed = buf.getvalue()
+        if len(compressed) >= len(body):
+            return body
+        headers['Content-Encoding'] = 'gzip'
+        self._record('request', len(body) - len(compressed))
+        return compressed
+
+    def record_response(self, resp):
+        """Account the bytes saved by a compressed, fully read, response."""
+        if resp.headers.get('Content-Encoding') not in COMPRESSED_ENCODINGS:
+            return
+        try:
+            # NOTE: bytes received, before decompression
+            received = resp.raw.tell()
+        except AttributeError:
+            return
+        self._record('response', max(len(resp.content) - received, 0))
+
+    def stats(self):
+        """Return the number of bodies compressed and of bytes saved."""
+        with self._lock:
+            return dict(self._stats)
+
+
+def from_option(compression):
+    """Return the compression selected by a client's 'compression' option.
+
+    :param compression: None or False to disable compression, True for
+        the default settings, a dict of settings, or a
+        :class:`Compression`.
+    """
+    if not compression:
+        return None
+    if compression is True:
+        return Compression()
+    if isinstance(compression, dict):
+        return Compression(**compression)
+    return compression
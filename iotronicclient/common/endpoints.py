@@ -0,0 +1,242 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Selection of the Iotronic API replica used for each request, and cache
+of the endpoints found in the service catalog.
+"""
+
+import threading
+import time
+
+from keystoneauth1 import exceptions as kexc
+import six.moves.urllib.parse as urlparse
+
+from iotronicclient.common import circuit
+
+# Weight of the last observation in the moving averages
+DEFAULT_DECAY = 0.3
+# Seconds added to the latency of an endpoint returning only errors
+ERROR_PENALTY = 1.0
+# Seconds during which an endpoint found in the catalog is reused
+DEFAULT_CATALOG_TTL = 300
+
+
+class Endpoint(object):
+    """An API endpoint with the moving averages of its latency and errors.
+
+    :param breaker: the circuit breaker guarding the endpoint, if any.
+    """
+
+    def __init__(self, url, trimmed, breaker=None):
+        self.url = url
+        self.trimmed = trimmed
+        self.breaker = breaker
+        parts = urlparse.urlsplit(trimmed)
+        self.origin = '%s://%s' % (parts.scheme, parts.netloc)
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.requests = 0
+
+    def join(self, url):
+        """Return the absolute URL of 'url', relative to the endpoint.
+
+        Same as urljoin(trimmed, url), without parsing the URLs in the
+        common cases: an absolute path replaces the path of the endpoint.
+        """
+        if url.startswith('/') and not url.startswith('//'):
+            return self.origin + url
+        if url.startswith(('http://', 'https://')):
+            return url
+        return urlparse.urljoin(self.trimmed, url)
+
+    @property
+    def is_open(self):
+        """Whether the circuit breaker of the endpoint is open."""
+        return (self.breaker is not None and
+                self.breaker.state == circuit.OPEN)
+
+    @property
+    def score(self):
+        return self.latency + ERROR_PENALTY * self.error_rate
+
+    def __repr__(self):
+        return "<Endpoint %s>" % self.url
+
+
+class EndpointSet(object):
+    """Pick the endpoint with the best recent latency and error rate.
+
+    Each endpoint keeps an exponentially weighted moving average (EWMA) of
+    the latency and of the error rate of the requests sent to it. The
+    endpoints never used have a score of 0, so every endpoint is tried
+    before the scores are compared. The endpoints whose circuit breaker
+    is open are only selected when no other one is left.
+
+    :param urls: list of endpoint URLs.
+    :param trim: function returning the base URL of an endpoint.
+    :param decay: weight of the last request in the averages.
+    :param breaker: function returning the circuit breaker of an endpoint
+        URL, or None.
+    """
+
+    def __init__(self, urls, trim=None, decay=DEFAULT_DECAY, breaker=None):
+        trim = trim or (lambda url: url)
+        breaker = breaker or (lambda url: None)
+        self.endpoints = [Endpoint(url, trim(url), breaker(url))
+                          for url in urls]
+        self.decay = decay
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def select(self, exclude=()):
+        """Return the endpoint with the best score, not in 'exclude'."""
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude]
+            available = [e for e in candidates if not e.is_open]
+            return min(available or candidates or self.endpoints,
+                       key=lambda e: e.score)
+
+    def record(self, endpoint, latency, failed=False):
+        """Account a request sent to 'endpoint'."""
+        with self._lock:
+            if endpoint.requests:
+                endpoint.latency += self.decay * (latency - endpoint.latency)
+                endpoint.error_rate += self.decay * (
+                    float(failed) - endpoint.error_rate)
+            else:
+                endpoint.latency = latency
+                endpoint.error_rate = float(failed)
+            endpoint.requests += 1
+
+    def stats(self):
+        """Return the averages of each endpoint, by URL."""
+        with self._lock:
+            return dict((e.url, {'latency': e.latency,
+                                 'error_rate': e.error_rate,
+                                 'requests': e.requests})
+                        for e in self.endpoints)
+
+
+def _auth_scope(session):
+    """Return the identity and scope of the session's token, or None.
+
+    The auth plugin authenticates if it has no valid token yet.
+    """
+    auth = session.auth
+    try:
+        access = auth.get_access(session)
+    except AttributeError:
+        # NOTE: no auth plugin, or not an identity plugin
+        return None
+    return (getattr(auth, 'auth_url', None), access.user_id,
+            access.project_id, access.domain_id)
+
+
+class CatalogCache(object):
+    """Cache of the endpoints looked up in the service catalog.
+
+    The endpoints are kept per auth URL, user and scope (project or
+    domain) of the session's token, service type, interface and region.
+
+    :param ttl: seconds during which an endpoint is reused, a negative
+        value to reuse it until it is invalidated.
+    """
+
+    def __init__(self, ttl=DEFAULT_CATALOG_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                    self.ttl < 0 or time.time() - entry[1] <= self.ttl):
+                self._stats['hits'] += 1
+                return entry[0]
+            self._stats['misses'] += 1
+            return None
+
+    def get_endpoint(self, session, service_type, interface=None,
+                     region_name=None):
+        """Return the endpoint of a service, as session.get_endpoint().
+
+        :raises keystoneauth1.exceptions.EndpointNotFound: if the catalog
+            has no such endpoint; any endpoint cached for it is dropped.
+        """
+        scope = _auth_scope(session)
+        if scope is None:
+            return session.get_endpoint(service_type=service_type,
+                                        interface=interface,
+                                        region_name=region_name)
+        key = scope + (service_type, interface, region_name)
+        url = self._get(key)
+        if url is not None:
+            return url
+        try:
+            url = session.get_endpoint(service_type=service_type,
+                                       interface=interface,
+                                       region_name=region_name)
+        except kexc.EndpointNotFound:
+            self._invalidate(key)
+            raise
+        if url is None:
+            self._invalidate(key)
+        else:
+            with self._lock:
+                self._entries[key] = (url, time.time())
+        return url
+
+    def _invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._stats['invalidations'] += 1
+
+    def invalidate(self):
+        """Drop all the cached endpoints."""
+        with self._lock:
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Return the number of hits, misses and invalidations."""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+
+_catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+
+def from_option(catalog_cache):
+    """Return the cache selected by a client's 'catalog_cache' option.
+
+    :param catalog_cache: None or False to look the endpoints up every
+        time, True for the cache shared by the process, a dict of
+        settings for a new :class:`CatalogCache`, or a
+        :class:`CatalogCache`.
+    """
+    global _catalog_cache
+    if not catalog_cache:
+        return None
+    if catalog_cache is True:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                _catalog_cache = CatalogCache()
+            return _catalog_cache
+    if isinstance(catalog_cache, dict):
+        return CatalogCache(**catalog_cache)
+    return catalog_cache
@@ -14,11 +14,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import hashlib
+import json
 import logging
 import os
+import tempfile
+import threading
+import time
 
 import appdirs
-import dogpile.cache
 
 from iotronicclient.common.i18n import _LW
 
@@ -27,22 +31,26 @@ LOG = logging.getLogger(__name__)
 AUTHOR = 'openstack'
 PROGNAME = 'python-iotronicclient'
 
-CACHE = None
 CACHE_DIR = appdirs.user_cache_dir(PROGNAME, AUTHOR)
 CACHE_EXPIRY_ENV_VAR = 'IOTRONICCLIENT_CACHE_EXPIRY'  # environment variable
-CACHE_FILENAME = os.path.join(CACHE_DIR, 'iotronic-api-version.dbm')
+CACHE_FILENAME = os.path.join(CACHE_DIR, 'iotronic-api-version.json')
+TOKEN_CACHE_DIR = os.path.join(CACHE_DIR, 'tokens')
 DEFAULT_EXPIRY = 300  # seconds
 
+# In-process cache in front of the file: key -> (data, time it was cached)
+_MEMORY = {}
+_MEMORY_LOCK = threading.Lock()
+_EXPIRY = None
 
-def _get_cache():
-    """Configure file caching."""
-    global CACHE
-    if CACHE is None:
+# NOTE: os.replace() overwrites the destination on every platform, it is
+# missing from Python 2 where os.rename() does it on POSIX systems
+_replace = getattr(os, 'replace', os.rename)
 
-        # Ensure cache directory present
-        if not os.path.exists(CACHE_DIR):
-            os.makedirs(CACHE_DIR)
 
+def _get_expiry():
+    """Return the cache expiry, in seconds, as set in the environment."""
+    global _EXPIRY
+    if _EXPIRY is None:
         # Use the cache expiry if specified in an env var
         expiry_time = os.environ.get(CACHE_EXPIRY_ENV_VAR, DEFAULT_EXPIRY)
         try:
@@ -55,15 +63,72 @@ def _get_cache():
                          'curr_val': expiry_time,
                          'default': DEFAULT_EXPIRY})
             expiry_time = DEFAULT_EXPIRY
+        _EXPIRY = expiry_time
+    return _EXPIRY
 
-        CACHE = dogpile.cache.make_region(key_mangler=str).configure(
-            'dogpile.cache.dbm',
-            expiration_time=expiry_time,
-            arguments={
-                "filename": CACHE_FILENAME,
-            }
-        )
-    return CACHE
+
+def _is_stale(cached_time, expiry):
+    # NOTE: a negative expiry never expires
+    return 0 <= expiry < time.time() - cached_time
+
+
+def _read_file():
+    """Return the entries of the cache file, in a single read.
+
+    The file is only ever replaced, never modified in place, so it is
+    read without any lock.
+
+    :returns: a dict of the [data, time it was cached] of each key, empty
+        when the file is missing or invalid.
+    """
+    try:
+        with open(CACHE_FILENAME, 'rb') as f:
+            content = f.read()
+        entries = json.loads(content.decode('utf-8'))
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(entries, dict):
+        return {}
+    return dict((key, entry) for key, entry in entries.items()
+                if isinstance(entry, list) and len(entry) == 2 and
+                isinstance(entry[1], (int, float)))
+
+
+def _makedirs(path, mode=0o777):
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path, mode)
+    except OSError:
+        # NOTE: created by another process in the meantime
+        if not os.path.isdir(path):
+            raise
+
+
+def _replace_file(filename, content):
+    """Replace 'filename' by a file holding the bytes 'content'.
+
+    The content is written to a temporary file of the same directory,
+    which is then renamed over 'filename': the readers see either the
+    old file or the new one. Of two processes writing the file at the
+    same time, the last one wins. The file is only readable by its
+    owner.
+    """
+    directory, name = os.path.split(filename)
+    # NOTE: mkstemp() creates the file with mode 0600
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix='.%s.' % name)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        _replace(tmp_name, filename)
+    except Exception:
+        os.unlink(tmp_name)
+        raise
+
+
+def _write_file(entries):
+    """Replace the cache file by one holding 'entries'."""
+    _makedirs(CACHE_DIR)
+    _replace_file(CACHE_FILENAME, json.dumps(entries).encode('utf-8'))
 
 
 def _build_key(host, port):
@@ -71,15 +136,50 @@ def _build_key(host, port):
     return "%s:%s" % (host, port)
 
 
+def _remember(key, data, cached_time):
+    with _MEMORY_LOCK:
+        _MEMORY[key] = (data, cached_time)
+
+
+def _recall(key, expiry):
+    """Return the data held in memory for 'key', None if it is stale."""
+    with _MEMORY_LOCK:
+        entry = _MEMORY.get(key)
+    if entry is None or _is_stale(entry[1], expiry):
+        return None
+    return entry[0]
+
+
+def clear_memory():
+    """Forget the data cached in memory, the file is left unchanged."""
+    with _MEMORY_LOCK:
+        _MEMORY.clear()
+
+
 def save_data(host, port, data):
     """Save 'data' for a particular 'host' in the appropriate cache dir.
 
+    The data is also kept in memory, for the clients created later by
+    the process. The stale entries of the file are dropped.
+
     param host: The host that we need to save data for
     param port: The port on the host that we need to save data for
     param data: The data we want saved
     """
     key = _build_key(host, port)
-    _get_cache().set(key, data)
+    now = time.time()
+    _remember(key, data, now)
+
+    expiry = _get_expiry()
+    entries = dict((k, v) for k, v in _read_file().items()
+                   if not _is_stale(v[1], expiry))
+    entries[key] = [data, now]
+    try:
+        _write_file(entries)
+    except (IOError, OSError) as e:
+        LOG.warning(_LW("Could not save the API version of %(key)s in "
+                        "%(file)s: %(error)s"),
+                    {'key': key, 'file': CACHE_FILENAME, 'error': e})
 
 
 def retrieve_data(host, port, expiry=None):
@@ -88,17 +188,84 @@ def retrieve_data(host, port, expiry=None):
     Check to see if there is valid cached data for the host/port
     combination and return that if it isn't stale.
 
+    The data cached in memory by the process is used first, the file is
+    only read when it is missing or stale.
+
     param host: The host that we need to retrieve data for
     param port: The port on the host that we need to retrieve data for
     param expiry: The age in seconds before cached data is deemed invalid
     """
-    # Ensure that a cache file exists first
-    if not os.path.isfile(CACHE_FILENAME):
-        return None
-
     key = _build_key(host, port)
-    data = _get_cache().get(key, expiration_time=expiry)
+    if expiry is None:
+        expiry = _get_expiry()
+    data = _recall(key, expiry)
+    if data is not None:
+        return data
 
-    if data == dogpile.cache.api.NO_VALUE:
+    entry = _read_file().get(key)
+    if not entry or _is_stale(entry[1], expiry):
         return None
+    data, cached_time = entry
+    _remember(key, data, cached_time)
     return data
+
+
+class AuthStateCache(object):
+    """Cache of the token and service catalog of a Keystone auth plugin.
+
+    The auth state is kept in a file per user, auth URL and project (the
+    cache ID of the plugin), readable only by its owner. The plugin
+    loaded from the file authenticates again when its token is about to
+    expire, or when it is rejected: the new state is then saved by
+    :meth:`save`.
+
+    :param plugin: a keystoneauth identity plugin.
+    """
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.filename = None
+        self._saved_ref = None
+        try:
+            cache_id = plugin.get_cache_id()
+        except (AttributeError, NotImplementedError):
+            cache_id = None
+        if cache_id:
+            # NOTE: the cache ID is already a digest, hashed again to get
+            # a valid file name
+            name = hashlib.sha256(cache_id.encode('utf-8')).hexdigest()
+            self.filename = os.path.join(TOKEN_CACHE_DIR, name + '.json')
+
+    def load(self):
+        """Set the auth state of the plugin from the file, if any.
+
+        :returns: True if an auth state was loaded.
+        """
+        if self.filename is None:
+            return False
+        try:
+            with open(self.filename, 'rb') as f:
+                content = f.read()
+            self.plugin.set_auth_state(content.decode('utf-8'))
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return False
+        self._saved_ref = self.plugin.auth_ref
+        return self._saved_ref is not None
+
+    def save(self):
+        """Save the auth state of the plugin, if it changed since loaded."""
+        auth_ref = self.plugin.auth_ref
+        if (self.filename is None or auth_ref is None or
+                auth_ref is self._saved_ref):
+            return
+        self._saved_ref = auth_ref
+        state = self.plugin.get_auth_state()
+        if not state:
+            return
+        try:
+            _makedirs(TOKEN_CACHE_DIR, 0o700)
+            _replace_file(self.filename, state.encode('utf-8'))
+        except (IOError, OSError) as e:
+            LOG.warning(_LW("Could not save the token in %(file)s: "
+                            "%(error)s"),
+                        {'file': self.filename, 'error': e})
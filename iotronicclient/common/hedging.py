@@ -0,0 +1,106 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Hedging of the GET requests of the HTTP client.
+
+A hedged request is sent a second time when no response arrived within
+a delay matching a high percentile of the recent latencies. The first
+response received is used and the other one is discarded, so a few slow
+responses no longer dominate the tail latency of the client.
+"""
+
+import collections
+import threading
+
+HEDGED_METHODS = frozenset(['GET'])
+
+DEFAULT_PERCENTILE = 95
+DEFAULT_INITIAL_DELAY = 1.0
+DEFAULT_MIN_DELAY = 0.01
+DEFAULT_MIN_SAMPLES = 20
+DEFAULT_WINDOW_SIZE = 100
+
+
+class HedgingPolicy(object):
+    """When to send a duplicate of a slow GET request.
+
+    :param percentile: percentile of the recent latencies after which the
+        duplicate request is sent.
+    :param initial_delay: delay (in seconds) used until 'min_samples'
+        latencies have been observed.
+    :param min_delay: lower bound (in seconds) of the delay.
+    :param min_samples: number of latencies needed to use the percentile.
+    :param window_size: number of recent latencies kept.
+    """
+
+    def __init__(self, percentile=DEFAULT_PERCENTILE,
+                 initial_delay=DEFAULT_INITIAL_DELAY,
+                 min_delay=DEFAULT_MIN_DELAY,
+                 min_samples=DEFAULT_MIN_SAMPLES,
+                 window_size=DEFAULT_WINDOW_SIZE):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min(min_samples, window_size)
+        self._latencies = collections.deque(maxlen=window_size)
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def applies_to(self, method):
+        return method.upper() in HEDGED_METHODS
+
+    def get_delay(self):
+        """Return the time to wait for a response before hedging."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        index = int(round(self.percentile / 100.0 * (len(latencies) - 1)))
+        return max(latencies[index], self.min_delay)
+
+    def record_request(self, latency, hedged=False, hedge_won=False):
+        """Account a request, with the latency of its first response."""
+        with self._lock:
+            self._latencies.append(latency)
+            self._requests += 1
+            if hedged:
+                self._hedged += 1
+            if hedge_won:
+                self._hedge_wins += 1
+
+    def stats(self):
+        """Return how often the requests were hedged, and the hedges won."""
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'hedged': self._hedged,
+                'hedge_wins': self._hedge_wins,
+            }
+
+
+def from_option(hedging):
+    """Return the policy selected by a client's 'hedging' option.
+
+    :param hedging: None or False to disable hedging, True for a default
+        policy, a dict for a policy created with these settings, or a
+        :class:`HedgingPolicy`.
+    """
+    if not hedging:
+        return None
+    if hedging is True:
+        return HedgingPolicy()
+    if isinstance(hedging, dict):
+        return HedgingPolicy(**hedging)
+    return hedging
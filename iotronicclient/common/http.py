@@ -13,32 +13,50 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import copy
+import codecs
 from distutils.version import StrictVersion
 import functools
 import hashlib
+import itertools
+import json
 import logging
+import mmap
 import os
 import socket
 import ssl
+import sys
 import textwrap
+import threading
 import time
 
 from keystoneauth1 import adapter
 from keystoneauth1 import exceptions as kexc
-from oslo_serialization import jsonutils
+from oslo_utils import importutils
 from oslo_utils import strutils
+from oslo_utils import timeutils
 import requests
+from requests.packages.urllib3 import exceptions as urllib3_exc
 import six
 from six.moves import http_client
+from six.moves import queue
 import six.moves.urllib.parse as urlparse
 
+from iotronicclient.common import circuit
+from iotronicclient.common import compression as comp
+from iotronicclient.common import endpoints
 from iotronicclient.common import filecache
+from iotronicclient.common import hedging
 from iotronicclient.common.i18n import _
 from iotronicclient.common.i18n import _LE
 from iotronicclient.common.i18n import _LW
+from iotronicclient.common import jsoncodec
+from iotronicclient.common import jsonstream
+from iotronicclient.common import pooling
+from iotronicclient.common import retry
 from iotronicclient import exc
 
+msgpack = importutils.try_import('msgpack')
+
 # NOTE(deva): Record the latest version that this client was tested with.
 #             We still have a lot of work to do in the client to implement
 #             microversion support in the client properly! See
@@ -51,13 +69,26 @@ LOG = logging.getLogger(__name__)
 USER_AGENT = 'python-iotronicclient'
 CHUNKSIZE = 1024 * 64  # 64kB
 
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+_ACCEPT_HEADERS = {
+    'json': 'application/json',
+    'msgpack': MSGPACK_CONTENT_TYPE + ', application/json;q=0.9',
+}
+
 API_VERSION = '/v1'
 API_VERSION_SELECTED_STATES = ('user', 'negotiated', 'cached', 'default')
 
-DEFAULT_MAX_RETRIES = 5
-DEFAULT_RETRY_INTERVAL = 2
+DEFAULT_MAX_RETRIES = retry.DEFAULT_MAX_RETRIES
+DEFAULT_RETRY_INTERVAL = retry.DEFAULT_RETRY_INTERVAL
+DEFAULT_TIMEOUT = 600
 SENSITIVE_HEADERS = ('X-Auth-Token',)
 
+# Debug logging of the requests and responses: 1 request in
+# DEFAULT_LOG_SAMPLE_RATE is logged, with the first DEFAULT_LOG_BODY_MAX
+# characters of its body
+DEFAULT_LOG_SAMPLE_RATE = 1
+DEFAULT_LOG_BODY_MAX = 4096
+
 SUPPORTED_ENDPOINT_SCHEME = ('http', 'https')
 
 
@@ -66,18 +97,299 @@ def _trim_endpoint_api_version(url):
     return url.rstrip('/').rstrip(API_VERSION)
 
 
-def _extract_error_json(body):
+def _extract_error_json(body, content_type=None):
     """Return  error_message from the HTTP response body."""
     error_json = {}
+    if not body:
+        return error_json
+    # NOTE: the HTML or text error pages of proxies are not decoded
+    if content_type and not ('json' in content_type or
+                             MSGPACK_CONTENT_TYPE in content_type):
+        return error_json
+    try:
+        if content_type and MSGPACK_CONTENT_TYPE in content_type:
+            body_json = _unpackb(body)
+        else:
+            body_json = jsoncodec.loads(body)
+        raw_msg = body_json.get('error_message')
+        if isinstance(raw_msg, dict):
+            error_json = raw_msg
+        elif raw_msg:
+            error_json = jsoncodec.loads(raw_msg)
+    except (AttributeError, ValueError):
+        pass
+
+    return error_json if isinstance(error_json, dict) else {}
+
+
+class ErrorEnvelope(object):
+    """The error of an API response, decoded once.
+
+    The error is held, as a JSON document, by the 'error_message' member
+    of the body. Its 'faultstring' and 'debuginfo' are the message and
+    details of the error; the errors raised by pecan only have a
+    'description'.
+
+    :param body: the raw body of the response.
+    :param content_type: the Content-Type of the response.
+    """
+
+    def __init__(self, body, content_type=None):
+        error_json = _extract_error_json(body, content_type)
+        self.message = (error_json.get('faultstring') or
+                        error_json.get('description'))
+        self.details = error_json.get('debuginfo')
+
+    @classmethod
+    def from_response(cls, resp, body=None):
+        if body is None:
+            body = resp.content
+        return cls(body, resp.headers.get('Content-Type'))
+
+    def to_exception(self, resp, method, url):
+        """Return the exception raised for the response."""
+        return exc.from_response(resp, self.message, self.details,
+                                 method, url)
+
+
+def _log_body(body, limit):
+    """Return the text of a body to log, passwords masked, cut after 'limit'.
+
+    The passwords are masked before the body is cut, a password cut in
+    the middle would not be recognized.
+
+    :param limit: maximum number of characters logged, 0 for no limit.
+    """
+    if isinstance(body, six.binary_type):
+        body = body.decode('utf-8', 'replace')
+    body = strutils.mask_password(body)
+    if limit and len(body) > limit:
+        return body[:limit] + (' ... (%d characters not logged)' %
+                               (len(body) - limit))
+    return body
+
+
+def _unpackb(data):
     try:
-        body_json = jsonutils.loads(body)
-        if 'error_message' in body_json:
-            raw_msg = body_json['error_message']
-            error_json = jsonutils.loads(raw_msg)
+        return msgpack.unpackb(data, raw=False)
+    except msgpack.UnpackException as e:
+        # NOTE: the other errors of msgpack are ValueErrors
+        raise ValueError(e)
+
+
+def get_accept_header(wire_format=None):
+    """Return the Accept header of the JSON requests for a wire format.
+
+    :param wire_format: 'json' (the default), or 'msgpack' to ask for
+        MessagePack responses, the JSON ones being still accepted.
+    :raises exc.ValidationError: for an unknown format.
+    :raises exc.ClientException: when msgpack is not installed.
+    """
+    wire_format = wire_format or 'json'
+    if wire_format not in _ACCEPT_HEADERS:
+        raise exc.ValidationError(
+            _("Unsupported wire format %(format)s, the supported formats "
+              "are: %(formats)s") %
+            {'format': wire_format,
+             'formats': ', '.join(sorted(_ACCEPT_HEADERS))})
+    if wire_format == 'msgpack' and msgpack is None:
+        raise exc.ClientException(
+            _("The msgpack wire format requires the 'msgpack' library, "
+              "install python-iotronicclient with the 'msgpack' extra."))
+    return _ACCEPT_HEADERS[wire_format]
+
+
+def decode_body(resp):
+    """Decode a JSON or MessagePack response body, None otherwise."""
+    content_type = resp.headers.get('Content-Type') or ''
+    if MSGPACK_CONTENT_TYPE in content_type:
+        try:
+            return _unpackb(resp.content)
+        except ValueError:
+            LOG.error(_LE('Could not decode response body as MessagePack'))
+            return resp.content
+    if 'application/json' in content_type:
+        return decode_json_body(resp)
+    return None
+
+
+def decode_json_body(resp):
+    """Decode the JSON body of a response straight from its bytes.
+
+    The content is decoded once, without building the text of the
+    response: the JSON body of the API responses is UTF-8 encoded.
+    """
+    try:
+        return jsoncodec.loads(resp.content)
     except ValueError:
+        LOG.error(_LE('Could not decode response body as JSON'))
+        return resp.text
+
+
+def _stream_json_body(resp, response_key):
+    """Return the stream of the elements of a JSON list response."""
+    content_type = resp.headers.get('Content-Type') or ''
+    if (resp.status_code in (http_client.NO_CONTENT,
+                             http_client.RESET_CONTENT) or
+            'application/json' not in content_type):
+        resp.close()
+        return jsonstream.ArrayStream([b'{}'], response_key)
+    return jsonstream.ArrayStream(resp.iter_content(chunk_size=CHUNKSIZE),
+                                  response_key, close=resp.close)
+
+
+class FileBody(object):
+    """A request body streamed from a file, CHUNKSIZE bytes at a time.
+
+    The body is read from the current position of the file, which is
+    restored each time the body is sent again, e.g. when the request is
+    retried, so the file must be seekable to be sent more than once.
+
+    :param fileobj: the file opened in binary mode.
+    :param chunksize: the size of the chunks read and sent.
+    """
+
+    def __init__(self, fileobj, chunksize=CHUNKSIZE):
+        self.fileobj = fileobj
+        self.chunksize = chunksize
+        # NOTE: requests sets the Content-Length from 'len', the body is
+        # sent with "Transfer-Encoding: chunked" when it is unknown
+        try:
+            self._start = fileobj.tell()
+            fileobj.seek(0, os.SEEK_END)
+            self.len = fileobj.tell() - self._start
+            fileobj.seek(self._start)
+        except (AttributeError, IOError, OSError, ValueError):
+            self._start = None
+            self.len = None
+
+    def __iter__(self):
+        if self._start is not None:
+            self.fileobj.seek(self._start)
+        while True:
+            chunk = self.fileobj.read(self.chunksize)
+            if not chunk:
+                return
+            yield chunk
+
+    def __str__(self):
+        # NOTE: curl syntax, for the debug log of the request
+        return '@%s' % getattr(self.fileobj, 'name', '-')
+
+
+class JSONFileBody(FileBody):
+    """A JSON object holding the text of a file, streamed from the file.
+
+    The other members of the object are encoded first, then the file is
+    read CHUNKSIZE bytes at a time, decoded as UTF-8 and escaped into
+    the string of member 'key', so the file is never held in memory. The
+    length of the body is not known in advance, it is sent with
+    "Transfer-Encoding: chunked".
+
+    :param obj: dict of the other members of the object.
+    :param key: the name of the member holding the text of the file.
+    :param fileobj: the file opened in binary mode.
+    :param chunksize: the size of the chunks read from the file.
+    """
+
+    def __init__(self, obj, key, fileobj, chunksize=CHUNKSIZE):
+        super(JSONFileBody, self).__init__(fileobj, chunksize)
+        self.len = None
+        head = jsoncodec.dumps(obj)[:-1].rstrip()
+        if obj:
+            head += b', '
+        self._head = head + jsoncodec.dumps(key) + b': "'
+
+    def __iter__(self):
+        yield self._head
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for chunk in super(JSONFileBody, self).__iter__():
+            text = decoder.decode(chunk)
+            if text:
+                # NOTE: ASCII only, the escapes are never cut
+                yield json.dumps(text)[1:-1].encode('ascii')
+        decoder.decode(b'', final=True)
+        yield b'"}'
+
+
+def _body_readinto(resp):
+    """Return the function reading the body of 'resp' into a buffer."""
+    raw = resp.raw
+    if resp.headers.get('Content-Encoding'):
+        def readinto(buf):
+            data = raw.read(len(buf), decode_content=True)
+            buf[:len(data)] = data
+            return len(data)
+        return readinto
+    # NOTE: urllib3 reads into a new bytes object, then copies it: the
+    # bodies which are not decoded are read straight from the HTTP response
+    fp = getattr(raw, '_fp', None)
+    if hasattr(fp, 'readinto'):
+        return fp.readinto
+    return raw.readinto
+
+
+def _preallocate(fileobj, length):
+    """Reserve the disk space of the 'length' bytes written to 'fileobj'."""
+    fallocate = getattr(os, 'posix_fallocate', None)
+    if fallocate is None or not length:
+        return
+    try:
+        fallocate(fileobj.fileno(), fileobj.tell(), length)
+    except (AttributeError, IOError, OSError, ValueError):
+        # NOTE: not a regular file, or not supported by the file system
         pass
 
-    return error_json
+
+def write_body(resp, dest, chunksize=CHUNKSIZE):
+    """Write the body of a streamed response into a file or a buffer.
+
+    The body is read into a single buffer of 'chunksize' bytes, reused
+    for every chunk, or straight into 'dest' when it is a buffer.
+
+    :param resp: the response, received with stream=True.
+    :param dest: a file opened in binary mode, whose space is
+        preallocated from the Content-Length of the response, or a
+        writable buffer (bytearray, memoryview, mmap.mmap) large enough
+        for the body. Encoded (e.g. gzip) bodies are decoded.
+    :returns: the number of bytes written.
+    :raises exc.ValidationError: if the body does not fit in 'dest'.
+    """
+    readinto = _body_readinto(resp)
+    # NOTE: the Content-Length of an encoded body is not its decoded size
+    length = resp.headers.get('Content-Length')
+    if resp.headers.get('Content-Encoding') or not (length or '').isdigit():
+        length = None
+    else:
+        length = int(length)
+
+    if not isinstance(dest, (bytearray, memoryview, mmap.mmap)):
+        _preallocate(dest, length)
+        view = memoryview(bytearray(chunksize))
+        written = 0
+        while True:
+            n = readinto(view)
+            if not n:
+                return written
+            dest.write(view[:n])
+            written += n
+
+    view = memoryview(dest)
+    if length is not None and length > len(view):
+        raise exc.ValidationError(
+            _("The buffer of %(size)d bytes is too small for the response "
+              "body of %(length)d bytes") %
+            {'size': len(view), 'length': length})
+    written = 0
+    while True:
+        n = readinto(view[written:written + chunksize])
+        if not n:
+            return written
+        written += n
+        if written == len(view) and readinto(bytearray(1)):
+            raise exc.ValidationError(
+                _("The buffer of %d bytes is too small for the response "
+                  "body") % len(view))
 
 
 def get_server(endpoint):
@@ -89,34 +401,131 @@ def get_server(endpoint):
 
 
 class VersionNegotiationMixin(object):
-    def negotiate_version(self, conn, resp):
+    _discovery = None
+    _discovery_abandoned = False
+    _discovery_time = None
+    _negotiations = 0
+
+    def _start_version_discovery(self, discover_version):
+        """Start discovering the API version of the server, if asked to.
+
+        The version range of the server is fetched in the background, from
+        the root of the API, when no version was given nor cached. The
+        requests wait for the version it selects, instead of being sent
+        with the default version and negotiated after a 406 response.
+        """
+        if not discover_version or self.api_version_select_state != 'default':
+            return
+        self._discovery_lock = threading.Lock()
+        self._discovery = threading.Thread(
+            target=self._discover_version,
+            name='iotronicclient-version-discovery')
+        self._discovery.daemon = True
+        self._discovery.start()
+
+    def _discover_version(self):
+        start = time.time()
+        try:
+            resp = self._make_discovery_request()
+            min_ver, max_ver = self._parse_version_headers(resp)
+            if min_ver and max_ver:
+                with self._discovery_lock:
+                    # NOTE: a request already sent with the default version
+                    # would fail to negotiate once a version is selected
+                    if self._discovery_abandoned:
+                        LOG.debug('The API version discovery is over after '
+                                  'the requests stopped waiting for it, its '
+                                  'result is not used')
+                    else:
+                        self._select_negotiated_version(min_ver, max_ver)
+            else:
+                LOG.debug('No version header in the response of %s, the '
+                          'version is negotiated when needed', resp.url)
+        except Exception as e:
+            LOG.warning(_LW("Could not discover the API version of "
+                            "%(endpoint)s: %(error)s"),
+                        {'endpoint': self.endpoint, 'error': e})
+        finally:
+            self._discovery_time = time.time() - start
+
+    def _make_discovery_request(self):
+        raise NotImplementedError()
+
+    def _wait_for_version_discovery(self, deadline=None):
+        """Wait for the version discovery, if any, bounded by the deadline.
+
+        The wait takes at most half of the time left to the deadline, the
+        other half is left to the request. When the discovery is not over
+        by then, the request is sent with the version in use, negotiated
+        after a 406 response if needed.
+        """
+        discovery = self._discovery
+        if discovery is None:
+            return
+        discovery.join(None if deadline is None
+                       else max(deadline.leftover(), 0) / 2.0)
+        with self._discovery_lock:
+            if discovery.is_alive():
+                LOG.debug('The API version discovery is not over, using '
+                          'version %s', self.os_iotronic_api_version)
+                self._discovery_abandoned = True
+        self._discovery = None
+
+    def version_stats(self):
+        """Return the API version in use, and how it was selected.
+
+        'discovery_time' is the time (in seconds) the version discovery
+        took, None when it was not done or is not over. 'negotiations' is
+        the number of versions negotiated after a 406 response.
+        """
+        return {
+            'version': self.os_iotronic_api_version,
+            'select_state': self.api_version_select_state,
+            'discovery_time': self._discovery_time,
+            'negotiations': self._negotiations,
+        }
+
+    def negotiate_version(self, conn, resp, endpoint=None, deadline=None):
         """Negotiate the server version
 
         Assumption: Called after receiving a 406 error when doing a request.
 
         param conn: A connection object
         param resp: The response object from http request
+        param endpoint: The endpoint which sent the response, defaults to
+                        the endpoint of the client
+        param deadline: The deadline of the call, bounding the request of
+                        the supported version range
         """
-        if self.api_version_select_state not in API_VERSION_SELECTED_STATES:
-            raise RuntimeError(
-                _('Error: self.api_version_select_state should be one of the '
-                  'values in: "%(valid)s" but had the value: "%(value)s"') %
-                {'valid': ', '.join(API_VERSION_SELECTED_STATES),
-                 'value': self.api_version_select_state})
+        self._check_version_select_state()
+        self._negotiations += 1
         min_ver, max_ver = self._parse_version_headers(resp)
         # NOTE: servers before commit 32fb6e99 did not return version headers
         # on error, so we need to perform a GET to determine
         # the supported version range
         if not max_ver:
             LOG.debug('No version header in response, requesting from server')
-            if self.os_iotronic_api_version:
-                base_version = ("/v%s" %
-                                str(self.os_iotronic_api_version).split('.')[
-                                    0])
-            else:
-                base_version = API_VERSION
-            resp = self._make_simple_request(conn, 'GET', base_version)
+            resp = self._make_simple_request(conn, 'GET',
+                                             self._base_version_url(),
+                                             endpoint, deadline=deadline)
             min_ver, max_ver = self._parse_version_headers(resp)
+        return self._select_negotiated_version(min_ver, max_ver, endpoint)
+
+    def _check_version_select_state(self):
+        if self.api_version_select_state not in API_VERSION_SELECTED_STATES:
+            raise RuntimeError(
+                _('Error: self.api_version_select_state should be one of the '
+                  'values in: "%(valid)s" but had the value: "%(value)s"') %
+                {'valid': ', '.join(API_VERSION_SELECTED_STATES),
+                 'value': self.api_version_select_state})
+
+    def _base_version_url(self):
+        if self.os_iotronic_api_version:
+            return "/v%s" % str(self.os_iotronic_api_version).split('.')[0]
+        return API_VERSION
+
+    def _select_negotiated_version(self, min_ver, max_ver, endpoint=None):
+        """Pick and cache a version within the server's supported range."""
         # If the user requested an explicit version or we have negotiated a
         # version and still failing then error now.  The server could
         # support the version requested but the requested operation may not
@@ -148,7 +557,7 @@ class VersionNegotiationMixin(object):
         LOG.debug('Negotiated API version is %s', negotiated_ver)
 
         # Cache the negotiated version for this server
-        host, port = get_server(self.endpoint)
+        host, port = get_server(endpoint or self.endpoint)
         filecache.save_data(host=host, port=port, data=negotiated_ver)
 
         return negotiated_ver
@@ -164,29 +573,72 @@ class VersionNegotiationMixin(object):
         # NOTE(jlvillal): Declared for unit testing purposes
         raise NotImplementedError()
 
-    def _make_simple_request(self, conn, method, url):
+    def _make_simple_request(self, conn, method, url, endpoint=None,
+                             deadline=None):
         # NOTE(jlvillal): Declared for unit testing purposes
         raise NotImplementedError()
 
 
-_RETRY_EXCEPTIONS = (exc.Conflict, exc.ServiceUnavailable,
-                     exc.ConnectionRefused, kexc.RetriableConnectionFailure)
+_RETRY_EXCEPTIONS = retry.RETRY_EXCEPTIONS
+
+
+def _connection_not_established(error):
+    """Whether a requests error happened before the request was sent."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0] if error.args else None, 'reason', None)
+    return isinstance(reason, urllib3_exc.NewConnectionError)
+
+
+def start_deadline(deadline):
+    """Start the time budget of a call.
+
+    :param deadline: number of seconds the whole call, including retries,
+        redirects and version negotiation, may take. None for no deadline.
+    :returns: a started oslo_utils StopWatch, or None.
+    """
+    if deadline is None:
+        return None
+    return timeutils.StopWatch(duration=deadline).start()
+
+
+def check_deadline(deadline, url, needed=0):
+    """Raise DeadlineExceeded unless 'needed' seconds are left."""
+    if deadline is not None and deadline.leftover() <= needed:
+        raise exc.DeadlineExceeded(
+            _("Deadline exceeded after %(elapsed).2f seconds while "
+              "handling request for %(url)s") %
+            {'elapsed': deadline.elapsed(), 'url': url})
 
 
 def with_retries(func):
-    """Wrapper for _http_request adding support for retries."""
+    """Wrapper for _http_request adding support for retries.
+
+    The delays between the attempts, and whether a retry is allowed at
+    all, are given by the retry_policy of the client. Requests with a
+    non-idempotent method are only retried when the server did not act
+    on them, unless they carry an idempotency key. Every attempt goes
+    through the circuit breaker of the client, if any: CircuitOpen is
+    raised, and not retried, while it is open (HTTPClient has none, it
+    guards each of its endpoints with their own breaker). A retry is not
+    attempted if the deadline of the call, passed in the 'deadline'
+    keyword argument, would elapse while waiting for it; DeadlineExceeded
+    is raised instead.
+    """
 
     @functools.wraps(func)
     def wrapper(self, url, method, **kwargs):
-        if self.conflict_max_retries is None:
-            self.conflict_max_retries = DEFAULT_MAX_RETRIES
-        if self.conflict_retry_interval is None:
-            self.conflict_retry_interval = DEFAULT_RETRY_INTERVAL
-
-        num_attempts = self.conflict_max_retries + 1
+        policy = self.retry_policy
+        deadline = kwargs.get('deadline')
+        idempotency_key = (kwargs.get('headers') or {}).get(
+            retry.IDEMPOTENCY_KEY_HEADER)
+        num_attempts = policy.max_retries + 1
+        policy.record_request()
         for attempt in range(1, num_attempts + 1):
+            check_deadline(deadline, url)
             try:
-                return func(self, url, method, **kwargs)
+                with circuit.watch(self.circuit_breaker):
+                    return func(self, url, method, **kwargs)
             except _RETRY_EXCEPTIONS as error:
                 msg = (_LE("Error contacting Iotronic server: %(error)s. "
                            "Attempt %(attempt)d of %(total)d") %
@@ -196,35 +648,110 @@ def with_retries(func):
                 if attempt == num_attempts:
                     LOG.error(msg)
                     raise
-                else:
-                    LOG.debug(msg)
-                    time.sleep(self.conflict_retry_interval)
+                if not policy.is_retriable(method, error, idempotency_key):
+                    LOG.debug("%s. Not retrying the %s request, it may "
+                              "have been processed.", msg, method)
+                    raise
+                if not policy.allow_retry():
+                    LOG.error(_LE("%s. Retry budget exhausted, giving up."),
+                              msg)
+                    raise
+                LOG.debug(msg)
+                delay = policy.get_delay(attempt, error)
+                check_deadline(deadline, url, needed=delay)
+                time.sleep(delay)
 
     return wrapper
 
 
+def add_idempotency_key(policy, method, headers):
+    """Add the idempotency key required by the policy to the headers."""
+    key = policy.idempotency_key(method)
+    if key:
+        headers.setdefault(retry.IDEMPOTENCY_KEY_HEADER, key)
+
+
+def _deadline_timeout(deadline, timeout):
+    """Clamp a (connect, read) timeout to the time left to a deadline."""
+    if deadline is None:
+        return timeout
+    leftover = max(deadline.leftover(), 0.001)
+    if timeout is None:
+        return leftover
+    if isinstance(timeout, tuple):
+        return tuple(leftover if t is None else min(t, leftover)
+                     for t in timeout)
+    return min(timeout, leftover)
+
+
 class HTTPClient(VersionNegotiationMixin):
+    """HTTP client for the Iotronic API.
+
+    :param endpoint: the endpoint URL, or a list of the URLs of equivalent
+        API endpoints. In the latter case each request is sent to the
+        endpoint with the best recent latency and error rate, and fails
+        over to the other endpoints when no connection can be established.
+    """
+
     def __init__(self, endpoint, **kwargs):
-        self.endpoint = endpoint
-        self.endpoint_trimmed = _trim_endpoint_api_version(endpoint)
+        if isinstance(endpoint, six.string_types):
+            endpoint_urls = [endpoint]
+        else:
+            endpoint_urls = list(endpoint)
+        if not endpoint_urls:
+            raise exc.EndpointException(_('No endpoint given'))
+        # NOTE: the first endpoint is used where the client needs a single
+        # one: the default API version cache
+        self.endpoint = endpoint_urls[0]
+        self.endpoint_trimmed = _trim_endpoint_api_version(self.endpoint)
+        circuit_breaker = kwargs.get('circuit_breaker')
+        self.endpoint_set = endpoints.EndpointSet(
+            endpoint_urls, trim=_trim_endpoint_api_version,
+            breaker=lambda url: circuit.from_option(url, circuit_breaker))
         self.auth_token = kwargs.get('token')
         self.auth_ref = kwargs.get('auth_ref')
         self.os_iotronic_api_version = kwargs.get('os_iotronic_api_version',
                                                   DEFAULT_VER)
         self.api_version_select_state = kwargs.get(
             'api_version_select_state', 'default')
-        self.conflict_max_retries = kwargs.pop('max_retries',
-                                               DEFAULT_MAX_RETRIES)
-        self.conflict_retry_interval = kwargs.pop('retry_interval',
-                                                  DEFAULT_RETRY_INTERVAL)
+        self.retry_policy = retry.get_policy(kwargs.get('max_retries'),
+                                             kwargs.get('retry_interval'),
+                                             kwargs.get('retry_policy'))
+        # NOTE: each endpoint has its own breaker, see _send_request
+        self.circuit_breaker = None
+        read_timeout = kwargs.get('timeout') or DEFAULT_TIMEOUT
+        connect_timeout = kwargs.get('connect_timeout') or read_timeout
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.deadline = kwargs.get('deadline')
+        self.hedging = hedging.from_option(kwargs.get('hedging'))
+        self.accept = get_accept_header(kwargs.get('wire_format'))
+        self.compression = comp.from_option(kwargs.get('compression'))
+        self.log_sample_rate = int(kwargs.get('log_sample_rate') or
+                                   DEFAULT_LOG_SAMPLE_RATE)
+        log_body_max = kwargs.get('log_body_max')
+        self.log_body_max = (DEFAULT_LOG_BODY_MAX if log_body_max is None
+                             else int(log_body_max))
+        self._log_counter = itertools.count()
+        self._base_headers_cache = None
         self.session = requests.Session()
-
-        parts = urlparse.urlparse(endpoint)
-        if parts.scheme not in SUPPORTED_ENDPOINT_SCHEME:
-            msg = _('Unsupported scheme: %s') % parts.scheme
-            raise exc.EndpointException(msg)
-
-        if parts.scheme == 'https':
+        self.adapter = pooling.PoolingAdapter(
+            pool_connections=(kwargs.get('pool_connections') or
+                              pooling.DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=(kwargs.get('pool_maxsize') or
+                          pooling.DEFAULT_POOL_MAXSIZE),
+            pool_block=bool(kwargs.get('pool_block')),
+            keepalive=kwargs.get('keepalive', True),
+            tcp_keepalive=kwargs.get('tcp_keepalive'))
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        schemes = set(urlparse.urlparse(url).scheme for url in endpoint_urls)
+        for scheme in schemes:
+            if scheme not in SUPPORTED_ENDPOINT_SCHEME:
+                msg = _('Unsupported scheme: %s') % scheme
+                raise exc.EndpointException(msg)
+
+        if 'https' in schemes:
             if kwargs.get('insecure') is True:
                 self.session.verify = False
             elif kwargs.get('ca_file'):
@@ -232,6 +759,8 @@ class HTTPClient(VersionNegotiationMixin):
             self.session.cert = (kwargs.get('cert_file'),
                                  kwargs.get('key_file'))
 
+        self._start_version_discovery(kwargs.get('discover_version'))
+
     def _process_header(self, name, value):
         """Redacts any sensitive header
 
@@ -271,14 +800,50 @@ class HTTPClient(VersionNegotiationMixin):
             curl.append('--key %s' % self.session.cert[1])
 
         if 'body' in kwargs:
-            body = strutils.mask_password(kwargs['body'])
+            body = kwargs['body']
+            if isinstance(body, FileBody):
+                body = str(body)
+            elif 'Content-Encoding' in kwargs['headers']:
+                body = '<%d bytes, %s>' % (
+                    len(body), kwargs['headers']['Content-Encoding'])
+            else:
+                body = _log_body(body, self.log_body_max)
             curl.append('-d \'%s\'' % body)
 
         curl.append(urlparse.urljoin(self.endpoint_trimmed, url))
         LOG.debug(' '.join(curl))
 
+    def _base_headers(self):
+        """Return the headers sent with every request.
+
+        They are only computed again when the token or the API version
+        of the client change. The dict returned must not be modified.
+        """
+        key = (self.auth_token, self.os_iotronic_api_version)
+        cached = self._base_headers_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        headers = {'User-Agent': USER_AGENT}
+        if self.os_iotronic_api_version:
+            headers['X-OpenStack-Iotronic-API-Version'] = (
+                self.os_iotronic_api_version)
+        if self.auth_token:
+            headers['X-Auth-Token'] = self.auth_token
+        self._base_headers_cache = (key, headers)
+        return headers
+
+    def _log_sampled(self):
+        """Return whether the request being sent is logged.
+
+        Nothing is logged, or computed for the log, unless DEBUG logging
+        is enabled, and then only 1 request in log_sample_rate.
+        """
+        if not LOG.isEnabledFor(logging.DEBUG):
+            return False
+        return next(self._log_counter) % self.log_sample_rate == 0
+
     @staticmethod
-    def log_http_response(resp, body=None):
+    def log_http_response(resp, body=None, limit=0):
         # NOTE(aarefiev): resp.raw is urllib3 response object, it's used
         # only to get 'version', response from request with 'stream = True'
         # should be used for raw reading.
@@ -287,18 +852,141 @@ class HTTPClient(VersionNegotiationMixin):
         dump.extend(['%s: %s' % (k, v) for k, v in resp.headers.items()])
         dump.append('')
         if body:
-            body = strutils.mask_password(body)
-            dump.extend([body, ''])
+            dump.extend([_log_body(body, limit), ''])
         LOG.debug('\n'.join(dump))
 
-    def _make_connection_url(self, url):
-        return urlparse.urljoin(self.endpoint_trimmed, url)
+    def _make_connection_url(self, url, endpoint=None):
+        if endpoint is None:
+            return urlparse.urljoin(self.endpoint_trimmed, url)
+        return urlparse.urljoin(_trim_endpoint_api_version(endpoint), url)
 
     def _parse_version_headers(self, resp):
         return self._generic_parse_version_headers(resp.headers.get)
 
-    def _make_simple_request(self, conn, method, url):
-        return conn.request(method, self._make_connection_url(url))
+    def _make_simple_request(self, conn, method, url, endpoint=None,
+                             deadline=None):
+        return conn.request(method, self._make_connection_url(url, endpoint),
+                            timeout=_deadline_timeout(deadline,
+                                                      self.timeout))
+
+    def _make_discovery_request(self):
+        # NOTE: the connection is kept in the pool for the first request
+        return self._make_simple_request(
+            self.session, 'GET', self._base_version_url(),
+            self.endpoint_set.select().url)
+
+    def endpoint_stats(self):
+        """Return the latency and error rate averages of each endpoint."""
+        return self.endpoint_set.stats()
+
+    def _send_request(self, endpoint, method, conn_url, **kwargs):
+        """Send a request to 'endpoint' and account its latency.
+
+        :raises CircuitOpen: if the circuit breaker of the endpoint is
+            open.
+        """
+        breaker = endpoint.breaker
+        if breaker is not None:
+            breaker.before_call()
+        start = timeutils.now()
+        try:
+            resp = self.session.request(method, conn_url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.endpoint_set.record(endpoint, timeutils.now() - start,
+                                     failed=True)
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+        failed = resp.status_code >= http_client.INTERNAL_SERVER_ERROR
+        self.endpoint_set.record(endpoint, timeutils.now() - start,
+                                 failed=failed)
+        if breaker is not None:
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        return resp
+
+    def connection_stats(self):
+        """Return the number of connections opened, reused and discarded."""
+        return self.adapter.stats()
+
+    def compression_stats(self):
+        """Return the bodies compressed and the bytes saved, if enabled."""
+        return self.compression.stats() if self.compression else {}
+
+    def hedging_stats(self):
+        """Return the counters of the hedged requests, if hedging is on."""
+        return self.hedging.stats() if self.hedging is not None else {}
+
+    def _send_hedged_request(self, endpoint, method, url, **kwargs):
+        """Send a request, and a duplicate if it is slow to respond.
+
+        The duplicate goes to another endpoint when there is one. The
+        first response received is returned; the other request cannot be
+        interrupted, its response is closed without reading the body.
+        When both requests fail, the error of the first one is raised.
+        """
+        results = queue.Queue()
+        lock = threading.Lock()
+        done = threading.Event()
+        kwargs['stream'] = True
+
+        def send(target, hedge):
+            conn_url = target.join(url)
+            try:
+                resp = self._send_request(target, method, conn_url, **kwargs)
+            except Exception:
+                results.put((hedge, None, sys.exc_info()))
+                return
+            with lock:
+                if done.is_set():
+                    resp.close()
+                else:
+                    results.put((hedge, resp, None))
+
+        def start(target, hedge):
+            worker = threading.Thread(target=send, args=(target, hedge))
+            worker.daemon = True
+            worker.start()
+
+        start_time = timeutils.now()
+        start(endpoint, False)
+        try:
+            hedge, resp, error = results.get(
+                timeout=self.hedging.get_delay())
+        except queue.Empty:
+            alternate = self.endpoint_set.select(exclude=[endpoint])
+            LOG.debug('No response from %(endpoint)s yet, hedging the '
+                      'request to %(alternate)s',
+                      {'endpoint': endpoint.url, 'alternate': alternate.url})
+            start(alternate, True)
+            hedge, resp, error = results.get()
+            if resp is None:
+                # NOTE: the other request may still succeed
+                hedge, resp = results.get()[:2]
+            hedged = True
+        else:
+            hedged = False
+        finally:
+            with lock:
+                done.set()
+        try:
+            while True:
+                other = results.get_nowait()[1]
+                if other is not None:
+                    other.close()
+        except queue.Empty:
+            pass
+        if resp is None:
+            six.reraise(*error)
+        self.hedging.record_request(timeutils.now() - start_time,
+                                    hedged=hedged, hedge_won=hedge)
+        return resp
 
     @with_retries
     def _http_request(self, url, method, **kwargs):
@@ -307,16 +995,12 @@ class HTTPClient(VersionNegotiationMixin):
         Wrapper around request.Session.request to handle tasks such
         as setting headers and error handling.
         """
+        deadline = kwargs.pop('deadline', None)
+        self._wait_for_version_discovery(deadline)
         # Copy the kwargs so we can reuse the original in case of redirects
-        kwargs['headers'] = copy.deepcopy(kwargs.get('headers', {}))
-        kwargs['headers'].setdefault('User-Agent', USER_AGENT)
-        if self.os_iotronic_api_version:
-            kwargs['headers'].setdefault('X-OpenStack-Iotronic-API-Version',
-                                         self.os_iotronic_api_version)
-        if self.auth_token:
-            kwargs['headers'].setdefault('X-Auth-Token', self.auth_token)
-
-        self.log_curl_request(method, url, kwargs)
+        headers = dict(self._base_headers())
+        headers.update(kwargs.get('headers') or {})
+        kwargs['headers'] = headers
 
         # NOTE(aarefiev): This is for backwards compatibility, request
         # expected body in 'data' field, previously we used httplib,
@@ -325,11 +1009,38 @@ class HTTPClient(VersionNegotiationMixin):
         if body:
             kwargs['data'] = body
 
-        conn_url = self._make_connection_url(url)
+        log = self._log_sampled()
+        tried = []
         try:
-            resp = self.session.request(method,
-                                        conn_url,
-                                        **kwargs)
+            while True:
+                endpoint = self.endpoint_set.select(exclude=tried)
+                tried.append(endpoint)
+                conn_url = endpoint.join(url)
+                if log:
+                    self.log_curl_request(method, conn_url, dict(
+                        kwargs, body=body) if body else kwargs)
+                kwargs['timeout'] = _deadline_timeout(deadline, self.timeout)
+                try:
+                    if (self.hedging is not None and
+                            self.hedging.applies_to(method)):
+                        resp = self._send_hedged_request(endpoint, method,
+                                                         url, **kwargs)
+                    else:
+                        resp = self._send_request(endpoint, method,
+                                                  conn_url, **kwargs)
+                    break
+                except exc.CircuitOpen as e:
+                    if len(tried) >= len(self.endpoint_set):
+                        raise
+                    LOG.debug('%s, failing over to another endpoint', e)
+                except requests.exceptions.RequestException as e:
+                    if (not _connection_not_established(e) or
+                            len(tried) >= len(self.endpoint_set)):
+                        raise
+                    LOG.warning(_LW("Cannot connect to %(endpoint)s, "
+                                    "failing over to another endpoint: "
+                                    "%(e)s"),
+                                {'endpoint': endpoint.url, 'e': e})
 
             # TODO(deva): implement graceful client downgrade when connecting
             # to servers that did not support microversions. Details here:
@@ -338,12 +1049,18 @@ class HTTPClient(VersionNegotiationMixin):
             # -a-old-iotronic-user-specified  # noqa
 
             if resp.status_code == http_client.NOT_ACCEPTABLE:
-                negotiated_ver = self.negotiate_version(self.session, resp)
+                negotiated_ver = self.negotiate_version(self.session, resp,
+                                                        endpoint.url,
+                                                        deadline=deadline)
                 kwargs['headers']['X-OpenStack-Iotronic-API-Version'] = (
                     negotiated_ver)
-                return self._http_request(url, method, **kwargs)
+                del kwargs['timeout']
+                return self._http_request(url, method, deadline=deadline,
+                                          **kwargs)
 
         except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                check_deadline(deadline, conn_url)
             message = (_("Error has occurred while handling "
                          "request for %(url)s: %(e)s") %
                        dict(url=conn_url, e=e))
@@ -352,47 +1069,57 @@ class HTTPClient(VersionNegotiationMixin):
             if isinstance(e, ValueError):
                 raise exc.ValidationError(message)
 
-            raise exc.ConnectionRefused(message)
+            error = exc.ConnectionRefused(message)
+            error.request_sent = not _connection_not_established(e)
+            raise error
 
-        body_str = None
-        if resp.headers.get('Content-Type') == 'application/octet-stream':
-            body_iter = resp.iter_content(chunk_size=CHUNKSIZE)
-            self.log_http_response(resp)
+        body = None
+        if (resp.headers.get('Content-Type') == 'application/octet-stream' or
+                (kwargs.get('stream') and
+                 resp.status_code < http_client.BAD_REQUEST)):
+            if log:
+                self.log_http_response(resp)
         else:
-            # Read body into string if it isn't obviously image data
-            body_str = resp.text
-            self.log_http_response(resp, body_str)
-            body_iter = six.StringIO(body_str)
+            # Read body if it isn't obviously image data, it is decoded
+            # only once, by the consumer
+            body = resp.content
+            if log:
+                self.log_http_response(resp, body, self.log_body_max)
 
         if resp.status_code >= http_client.BAD_REQUEST:
-            error_json = _extract_error_json(body_str)
-            # NOTE(vdrok): exceptions from iotronic controllers'
-            # _lookup methods
-            # are constructed directly by pecan instead of wsme, and contain
-            # only description field
-            raise exc.from_response(
-                resp, (error_json.get('faultstring') or
-                       error_json.get('description')),
-                error_json.get('debuginfo'), method, url)
+            raise ErrorEnvelope.from_response(resp, body).to_exception(
+                resp, method, url)
         elif resp.status_code in (http_client.MOVED_PERMANENTLY,
                                   http_client.FOUND,
                                   http_client.USE_PROXY):
             # Redirected. Reissue the request to the new location.
-            return self._http_request(resp['location'], method, **kwargs)
+            del kwargs['timeout']
+            return self._http_request(resp['location'], method,
+                                      deadline=deadline, **kwargs)
         elif resp.status_code == http_client.MULTIPLE_CHOICES:
             raise exc.from_response(resp, method=method, url=url)
 
-        return resp, body_iter
+        return resp
 
     def json_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type', 'application/json')
-        kwargs['headers'].setdefault('Accept', 'application/json')
-
-        if 'body' in kwargs:
-            kwargs['body'] = jsonutils.dump_as_bytes(kwargs['body'])
+        kwargs['headers'].setdefault('Accept', self.accept)
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        add_idempotency_key(self.retry_policy, method, kwargs['headers'])
+
+        # NOTE: a JSONFileBody is already encoded, and streamed
+        streamed = isinstance(kwargs.get('body'), FileBody)
+        if 'body' in kwargs and not streamed:
+            kwargs['body'] = jsoncodec.dumps(kwargs['body'])
+        if self.compression is not None:
+            self.compression.add_headers(kwargs['headers'])
+            if 'body' in kwargs and not streamed:
+                kwargs['body'] = self.compression.compress(kwargs['body'],
+                                                           kwargs['headers'])
 
-        resp, body_iter = self._http_request(url, method, **kwargs)
+        resp = self._http_request(url, method, **kwargs)
         content_type = resp.headers.get('Content-Type')
 
         if (resp.status_code in (
@@ -400,22 +1127,64 @@ class HTTPClient(VersionNegotiationMixin):
                 http_client.RESET_CONTENT) or content_type is None):
             return resp, list()
 
-        if 'application/json' in content_type:
-            body = ''.join([chunk for chunk in body_iter])
-            try:
-                body = jsonutils.loads(body)
-            except ValueError:
-                LOG.error(_LE('Could not decode response body as JSON'))
-        else:
-            body = None
+        body = decode_body(resp)
+        if self.compression is not None:
+            self.compression.record_response(resp)
 
         return resp, body
 
+    def json_stream_request(self, method, url, response_key, **kwargs):
+        """Send a request and decode its JSON list response incrementally.
+
+        :param response_key: the key of the list in the response, e.g.
+            'boards'.
+        :returns: a tuple of the response and of a
+            :class:`iotronicclient.common.jsonstream.ArrayStream` over the
+            elements of the list.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Accept', 'application/json')
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        resp = self._http_request(url, method, stream=True, **kwargs)
+        return resp, _stream_json_body(resp, response_key)
+
     def raw_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type',
                                      'application/octet-stream')
-        return self._http_request(url, method, **kwargs)
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        add_idempotency_key(self.retry_policy, method, kwargs['headers'])
+        resp = self._http_request(url, method, **kwargs)
+        if resp.headers.get('Content-Type') == 'application/octet-stream':
+            body_iter = resp.iter_content(chunk_size=CHUNKSIZE)
+        else:
+            body_iter = six.StringIO(resp.text)
+        return resp, body_iter
+
+    def download_request(self, method, url, dest, chunksize=CHUNKSIZE,
+                         **kwargs):
+        """Send a request, writing its raw response body into 'dest'.
+
+        See :func:`write_body` for the supported destinations.
+
+        :returns: a tuple of the response and of the number of bytes
+            written.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Accept', 'application/octet-stream')
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        resp = self._http_request(url, method, stream=True, **kwargs)
+        try:
+            written = write_body(resp, dest, chunksize)
+        except Exception:
+            resp.close()
+            raise
+        # NOTE: the body is fully read, the connection can be reused
+        resp.raw.release_conn()
+        return resp, written
 
 
 class VerifiedHTTPSConnection(six.moves.http_client.HTTPSConnection):
@@ -491,62 +1260,147 @@ class SessionClient(VersionNegotiationMixin, adapter.LegacyJsonAdapter):
                  max_retries,
                  retry_interval,
                  endpoint,
+                 deadline=None,
+                 retry_policy=None,
+                 circuit_breaker=None,
+                 wire_format=None,
+                 compression=None,
+                 discover_version=False,
+                 token_cache=None,
                  **kwargs):
         self.os_iotronic_api_version = os_iotronic_api_version
         self.api_version_select_state = api_version_select_state
-        self.conflict_max_retries = max_retries
-        self.conflict_retry_interval = retry_interval
+        self.retry_policy = retry.get_policy(max_retries, retry_interval,
+                                             retry_policy)
+        self.circuit_breaker = circuit.from_option(endpoint, circuit_breaker)
         self.endpoint = endpoint
+        self.token_cache = token_cache
+        self.deadline = deadline
+        self.accept = get_accept_header(wire_format)
+        self.compression = comp.from_option(compression)
+        self._endpoint_kwargs_cache = None
 
         super(SessionClient, self).__init__(**kwargs)
+        self._start_version_discovery(discover_version)
 
     def _parse_version_headers(self, resp):
         return self._generic_parse_version_headers(resp.headers.get)
 
-    def _make_simple_request(self, conn, method, url):
+    def compression_stats(self):
+        """Return the bodies compressed and the bytes saved, if enabled."""
+        return self.compression.stats() if self.compression else {}
+
+    def _endpoint_kwargs(self):
+        """Return the trimmed endpoint_override and the endpoint_filter.
+
+        They are only computed again when the attributes of the adapter
+        they derive from change. The endpoint_filter must not be modified.
+        """
+        key = (self.endpoint_override, self.interface, self.service_type,
+               self.region_name)
+        cached = self._endpoint_kwargs_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        endpoint_override = None
+        if isinstance(self.endpoint_override, six.string_types):
+            endpoint_override = _trim_endpoint_api_version(
+                self.endpoint_override)
+        endpoint_filter = {'interface': self.interface,
+                           'service_type': self.service_type,
+                           'region_name': self.region_name}
+        self._endpoint_kwargs_cache = (key, (endpoint_override,
+                                             endpoint_filter))
+        return endpoint_override, endpoint_filter
+
+    def _make_simple_request(self, conn, method, url, endpoint=None,
+                             deadline=None):
         # NOTE: conn is self.session for this class
-        return conn.request(url, method, raise_exc=False)
+        endpoint_override, endpoint_filter = self._endpoint_kwargs()
+        kwargs = {}
+        if deadline is not None:
+            kwargs['timeout'] = _deadline_timeout(deadline,
+                                                  self.session.timeout)
+        try:
+            return conn.request(url, method, raise_exc=False,
+                                user_agent=USER_AGENT,
+                                endpoint_override=endpoint_override,
+                                endpoint_filter=endpoint_filter, **kwargs)
+        except kexc.ConnectTimeout:
+            check_deadline(deadline, url)
+            raise
+
+    def _make_discovery_request(self):
+        # NOTE: the root of the API does not need a token, the version is
+        # discovered while the session authenticates
+        endpoint_override, endpoint_filter = self._endpoint_kwargs()
+        return self.session.request(self._base_version_url(), 'GET',
+                                    raise_exc=False, authenticated=False,
+                                    user_agent=USER_AGENT,
+                                    endpoint_override=endpoint_override,
+                                    endpoint_filter=endpoint_filter)
+
+    def _wait_for_version_discovery(self, deadline=None):
+        if self._discovery is not None and (self.auth or self.session.auth):
+            # NOTE: authenticate before waiting for the discovery
+            self.session.get_auth_headers(self.auth)
+        super(SessionClient, self)._wait_for_version_discovery(deadline)
 
     @with_retries
     def _http_request(self, url, method, **kwargs):
+        deadline = kwargs.pop('deadline', None)
+        self._wait_for_version_discovery(deadline)
+        if deadline is not None:
+            kwargs['timeout'] = _deadline_timeout(deadline,
+                                                  self.session.timeout)
         kwargs.setdefault('user_agent', USER_AGENT)
         kwargs.setdefault('auth', self.auth)
-        if isinstance(self.endpoint_override, six.string_types):
-            kwargs.setdefault(
-                'endpoint_override',
-                _trim_endpoint_api_version(self.endpoint_override)
-            )
+        endpoint_override, endpoint_filter = self._endpoint_kwargs()
+        if endpoint_override is not None:
+            kwargs.setdefault('endpoint_override', endpoint_override)
 
         if getattr(self, 'os_iotronic_api_version', None):
             kwargs['headers'].setdefault('X-OpenStack-Iotronic-API-Version',
                                          self.os_iotronic_api_version)
 
-        endpoint_filter = kwargs.setdefault('endpoint_filter', {})
-        endpoint_filter.setdefault('interface', self.interface)
-        endpoint_filter.setdefault('service_type', self.service_type)
-        endpoint_filter.setdefault('region_name', self.region_name)
+        if 'endpoint_filter' in kwargs:
+            for key, value in endpoint_filter.items():
+                kwargs['endpoint_filter'].setdefault(key, value)
+        else:
+            # NOTE: the session does not modify it
+            kwargs['endpoint_filter'] = endpoint_filter
 
-        resp = self.session.request(url, method,
-                                    raise_exc=False, **kwargs)
+        try:
+            resp = self.session.request(url, method,
+                                        raise_exc=False, **kwargs)
+        except kexc.ConnectTimeout:
+            check_deadline(deadline, url)
+            raise
+        except kexc.ConnectFailure as e:
+            # NOTE: keystoneauth raises it while handling the requests error
+            cause = getattr(e, '__context__', None)
+            if cause is not None:
+                e.request_sent = not _connection_not_established(cause)
+            raise
+        if self.token_cache is not None:
+            # NOTE: saves the token obtained if the cached one expired or
+            # was rejected
+            self.token_cache.save()
         if resp.status_code == http_client.NOT_ACCEPTABLE:
-            negotiated_ver = self.negotiate_version(self.session, resp)
+            negotiated_ver = self.negotiate_version(self.session, resp,
+                                                    deadline=deadline)
             kwargs['headers']['X-OpenStack-Iotronic-API-Version'] = (
                 negotiated_ver)
-            return self._http_request(url, method, **kwargs)
+            return self._http_request(url, method, deadline=deadline,
+                                      **kwargs)
         if resp.status_code >= http_client.BAD_REQUEST:
-            error_json = _extract_error_json(resp.content)
-            # NOTE(vdrok): exceptions from iotronic controllers' _lookup
-            # methods
-            # are constructed directly by pecan instead of wsme, and contain
-            # only description field
-            raise exc.from_response(resp, (error_json.get('faultstring') or
-                                           error_json.get('description')),
-                                    error_json.get('debuginfo'), method, url)
+            raise ErrorEnvelope.from_response(resp).to_exception(
+                resp, method, url)
         elif resp.status_code in (http_client.MOVED_PERMANENTLY,
                                   http_client.FOUND, http_client.USE_PROXY):
             # Redirected. Reissue the request to the new location.
             location = resp.headers.get('location')
-            resp = self._http_request(location, method, **kwargs)
+            resp = self._http_request(location, method, deadline=deadline,
+                                      **kwargs)
         elif resp.status_code == http_client.MULTIPLE_CHOICES:
             raise exc.from_response(resp, method=method, url=url)
         return resp
@@ -554,35 +1408,86 @@ class SessionClient(VersionNegotiationMixin, adapter.LegacyJsonAdapter):
     def json_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type', 'application/json')
-        kwargs['headers'].setdefault('Accept', 'application/json')
+        kwargs['headers'].setdefault('Accept', self.accept)
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        add_idempotency_key(self.retry_policy, method, kwargs['headers'])
 
+        # NOTE: a JSONFileBody is already encoded, and streamed
+        streamed = isinstance(kwargs.get('body'), FileBody)
         if 'body' in kwargs:
-            kwargs['data'] = jsonutils.dump_as_bytes(kwargs.pop('body'))
+            body = kwargs.pop('body')
+            kwargs['data'] = body if streamed else jsoncodec.dumps(body)
+        if self.compression is not None:
+            self.compression.add_headers(kwargs['headers'])
+            if 'data' in kwargs and not streamed:
+                kwargs['data'] = self.compression.compress(kwargs['data'],
+                                                           kwargs['headers'])
 
         resp = self._http_request(url, method, **kwargs)
-        body = resp.content
         content_type = resp.headers.get('content-type', None)
         status = resp.status_code
         if (status in (
                 http_client.NO_CONTENT, http_client.RESET_CONTENT) or
                 content_type is None):
             return resp, list()
-        if 'application/json' in content_type:
-            try:
-                body = resp.json()
-            except ValueError:
-                LOG.error(_LE('Could not decode response body as JSON'))
-        else:
-            body = None
+        body = decode_body(resp)
+        if self.compression is not None:
+            self.compression.record_response(resp)
 
         return resp, body
 
+    def json_stream_request(self, method, url, response_key, **kwargs):
+        """Send a request and decode its JSON list response incrementally.
+
+        :param response_key: the key of the list in the response, e.g.
+            'boards'.
+        :returns: a tuple of the response and of a
+            :class:`iotronicclient.common.jsonstream.ArrayStream` over the
+            elements of the list.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Accept', 'application/json')
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        resp = self._http_request(url, method, stream=True, **kwargs)
+        return resp, _stream_json_body(resp, response_key)
+
     def raw_request(self, method, url, **kwargs):
         kwargs.setdefault('headers', {})
         kwargs['headers'].setdefault('Content-Type',
                                      'application/octet-stream')
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        add_idempotency_key(self.retry_policy, method, kwargs['headers'])
+        if 'body' in kwargs:
+            # NOTE: the adapter would send it as JSON
+            kwargs['data'] = kwargs.pop('body')
         return self._http_request(url, method, **kwargs)
 
+    def download_request(self, method, url, dest, chunksize=CHUNKSIZE,
+                         **kwargs):
+        """Send a request, writing its raw response body into 'dest'.
+
+        See :func:`write_body` for the supported destinations.
+
+        :returns: a tuple of the response and of the number of bytes
+            written.
+        """
+        kwargs.setdefault('headers', {})
+        kwargs['headers'].setdefault('Accept', 'application/octet-stream')
+        kwargs['deadline'] = start_deadline(
+            kwargs.get('deadline', self.deadline))
+        resp = self._http_request(url, method, stream=True, **kwargs)
+        try:
+            written = write_body(resp, dest, chunksize)
+        except Exception:
+            resp.close()
+            raise
+        # NOTE: the body is fully read, the connection can be reused
+        resp.raw.release_conn()
+        return resp, written
+
 
 def _construct_http_client(endpoint=None,
                            session=None,
@@ -592,13 +1497,33 @@ def _construct_http_client(endpoint=None,
                            api_version_select_state='default',
                            max_retries=DEFAULT_MAX_RETRIES,
                            retry_interval=DEFAULT_RETRY_INTERVAL,
-                           timeout=600,
+                           retry_policy=None,
+                           circuit_breaker=None,
+                           hedging=None,
+                           wire_format=None,
+                           compression=None,
+                           discover_version=False,
+                           token_cache=None,
+                           pool_connections=None,
+                           pool_maxsize=None,
+                           pool_block=False,
+                           keepalive=True,
+                           tcp_keepalive=None,
+                           log_sample_rate=None,
+                           log_body_max=None,
+                           timeout=DEFAULT_TIMEOUT,
+                           connect_timeout=None,
+                           deadline=None,
                            ca_file=None,
                            cert_file=None,
                            key_file=None,
                            insecure=None,
                            **kwargs):
     if session:
+        if endpoint and not isinstance(endpoint, six.string_types):
+            LOG.warning(_LW('Only the first endpoint is used when using the '
+                            'session to construct a client: %s'), endpoint[0])
+            endpoint = endpoint[0]
         kwargs.setdefault('service_type', 'iot')
         kwargs.setdefault('user_agent', 'python-iotronicclient')
         kwargs.setdefault('interface', kwargs.pop('endpoint_type', None))
@@ -606,7 +1531,16 @@ def _construct_http_client(endpoint=None,
 
         ignored = {'token': token,
                    'auth_ref': auth_ref,
-                   'timeout': timeout != 600,
+                   'timeout': timeout != DEFAULT_TIMEOUT,
+                   'connect_timeout': connect_timeout,
+                   'hedging': hedging,
+                   'pool_connections': pool_connections,
+                   'pool_maxsize': pool_maxsize,
+                   'pool_block': pool_block,
+                   'keepalive': not keepalive,
+                   'tcp_keepalive': tcp_keepalive,
+                   'log_sample_rate': log_sample_rate,
+                   'log_body_max': log_body_max is not None,
                    'ca_file': ca_file,
                    'cert_file': cert_file,
                    'key_file': key_file,
@@ -625,6 +1559,13 @@ def _construct_http_client(endpoint=None,
                              max_retries=max_retries,
                              retry_interval=retry_interval,
                              endpoint=endpoint,
+                             deadline=deadline,
+                             retry_policy=retry_policy,
+                             circuit_breaker=circuit_breaker,
+                             wire_format=wire_format,
+                             compression=compression,
+                             discover_version=discover_version,
+                             token_cache=token_cache,
                              **kwargs)
     else:
         if kwargs:
@@ -638,7 +1579,22 @@ def _construct_http_client(endpoint=None,
                           api_version_select_state=api_version_select_state,
                           max_retries=max_retries,
                           retry_interval=retry_interval,
+                          retry_policy=retry_policy,
+                          circuit_breaker=circuit_breaker,
+                          hedging=hedging,
+                          wire_format=wire_format,
+                          compression=compression,
+                          discover_version=discover_version,
+                          pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block,
+                          keepalive=keepalive,
+                          tcp_keepalive=tcp_keepalive,
+                          log_sample_rate=log_sample_rate,
+                          log_body_max=log_body_max,
                           timeout=timeout,
+                          connect_timeout=connect_timeout,
+                          deadline=deadline,
                           ca_file=ca_file,
                           cert_file=cert_file,
                           key_file=key_file,
@@ -0,0 +1,181 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+JSON encoding and decoding of the requests, responses and CLI output.
+
+The fastest installed library among orjson, ujson and simplejson is
+used, the standard library otherwise. The objects a library cannot
+encode (big integers, custom types, ...) are encoded by the standard
+library, so all the codecs accept the same objects.
+"""
+
+import json
+import re
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+import six
+
+from iotronicclient.common.i18n import _
+
+orjson = importutils.try_import('orjson')
+ujson = importutils.try_import('ujson')
+simplejson = importutils.try_import('simplejson')
+
+_NON_ASCII = re.compile(u'[^\x00-\x7f]+')
+
+
+class JSONCodec(object):
+    """The standard library codec, base class of the others."""
+
+    name = 'json'
+
+    def loads(self, data):
+        """Decode a JSON document given as bytes or text."""
+        return jsonutils.loads(data)
+
+    def dumps(self, obj):
+        """Encode an object as UTF-8 JSON bytes."""
+        return jsonutils.dump_as_bytes(obj)
+
+    def dumps_pretty(self, obj):
+        """Encode an object as indented, ASCII only, JSON text."""
+        return json.dumps(obj, indent=4, separators=(',', ': '))
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj, default=jsonutils.to_primitive,
+                                option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super(OrjsonCodec, self).dumps(obj)
+
+    def dumps_pretty(self, obj):
+        try:
+            text = orjson.dumps(obj, option=(orjson.OPT_INDENT_2 |
+                                             orjson.OPT_NON_STR_KEYS))
+        except TypeError:
+            return super(OrjsonCodec, self).dumps_pretty(obj)
+        # NOTE: same output as the standard library: orjson only indents
+        # by 2 spaces, and does not escape the non ASCII characters.
+        text = _double_indent(text.decode('utf-8'))
+        # NOTE: orjson requires Python 3.7, which has str.isascii()
+        return text if text.isascii() else _escape_non_ascii(text)
+
+
+def _double_indent(text):
+    # NOTE: the leading spaces of a line are always indentation, JSON
+    # strings cannot hold a newline. Pass N adds 2 spaces to the lines
+    # indented N times or more, which then start with 4N spaces.
+    depth = 1
+    while True:
+        indent = '\n' + ' ' * (4 * depth - 2)
+        if indent not in text:
+            return text
+        text = text.replace(indent, indent + '  ')
+        depth += 1
+
+
+def _escape_non_ascii(text):
+    return _NON_ASCII.sub(lambda m: json.dumps(m.group(0))[1:-1], text)
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def loads(self, data):
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8')
+        return ujson.loads(data)
+
+    def dumps(self, obj):
+        try:
+            return ujson.dumps(obj, ensure_ascii=False,
+                               escape_forward_slashes=False).encode('utf-8')
+        except (TypeError, OverflowError):
+            return super(UjsonCodec, self).dumps(obj)
+
+
+class SimplejsonCodec(JSONCodec):
+    name = 'simplejson'
+
+    def loads(self, data):
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8')
+        return simplejson.loads(data)
+
+    def dumps(self, obj):
+        return simplejson.dumps(
+            obj, default=jsonutils.to_primitive).encode('utf-8')
+
+    def dumps_pretty(self, obj):
+        return simplejson.dumps(obj, indent=4, separators=(',', ': '))
+
+
+# By order of preference
+_CODECS = ((orjson, OrjsonCodec), (ujson, UjsonCodec),
+           (simplejson, SimplejsonCodec), (json, JSONCodec))
+
+_codec = None
+
+
+def available_codecs():
+    """Return the names of the codecs whose library is installed."""
+    return [cls.name for module, cls in _CODECS if module is not None]
+
+
+def get_codec():
+    """Return the codec in use, selecting the fastest one the first time."""
+    global _codec
+    if _codec is None:
+        _codec = next(cls() for module, cls in _CODECS if module is not None)
+    return _codec
+
+
+def set_codec(codec):
+    """Select the codec to use.
+
+    :param codec: the name of an available codec ('orjson', 'ujson',
+        'simplejson' or 'json'), or a :class:`JSONCodec` instance.
+    :raises ValueError: if the codec is not available.
+    """
+    global _codec
+    if isinstance(codec, six.string_types):
+        for module, cls in _CODECS:
+            if cls.name == codec and module is not None:
+                codec = cls()
+                break
+        else:
+            raise ValueError(_("JSON codec %(codec)s is not available, the "
+                               "available codecs are: %(available)s") %
+                             {'codec': codec,
+                              'available': ', '.join(available_codecs())})
+    _codec = codec
+
+
+def loads(data):
+    return get_codec().loads(data)
+
+
+def dumps(obj):
+    return get_codec().dumps(obj)
+
+
+def dumps_pretty(obj):
+    return get_codec().dumps_pretty(obj)
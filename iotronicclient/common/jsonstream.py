@@ -0,0 +1,160 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Incremental decoding of the list responses of the Iotronic API.
+
+A list response is a JSON object holding the array of resources under
+a key ('boards', 'plugins', ...) and, optionally, the 'next' link. The
+elements of the array are decoded one at a time while the response is
+received, so only one element is held in memory besides the unparsed
+part of the last chunk received.
+"""
+
+import codecs
+import json
+import re
+
+from iotronicclient.common.i18n import _
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters a number may continue with
+_NUMBER_CHARS = re.compile(r'[0-9.eE+-]*')
+_DECODER = json.JSONDecoder()
+
+
+class _NeedData(Exception):
+    """The buffer ends before the value being decoded."""
+
+
+class ArrayStream(object):
+    """Iterate over the elements of the array 'key' of a JSON object.
+
+    The other members of the object are available in 'rest' once the
+    iteration is over.
+
+    :param chunks: iterable of the bytes of the JSON document.
+    :param key: name of the array to iterate over.
+    :param close: function called once the iteration is over or stopped.
+    """
+
+    def __init__(self, chunks, key, close=None):
+        self.key = key
+        self.rest = {}
+        self._chunks = iter(chunks)
+        self._close = close
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        try:
+            for element in self._parse():
+                yield element
+        finally:
+            self.close()
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def _read(self):
+        """Append the next chunk to the buffer, dropping the parsed part."""
+        if self._eof:
+            raise ValueError(_('Truncated JSON document'))
+        try:
+            chunk = self._decoder.decode(next(self._chunks))
+        except StopIteration:
+            chunk = self._decoder.decode(b'', final=True)
+            self._eof = True
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+
+    def _retry(self, func):
+        while True:
+            try:
+                return func()
+            except _NeedData:
+                self._read()
+
+    def _skip_whitespace(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or self._eof:
+                return
+            self._read()
+
+    def _next_char(self, expected=None):
+        self._skip_whitespace()
+        if self._pos >= len(self._buf):
+            raise ValueError(_('Truncated JSON document'))
+        char = self._buf[self._pos]
+        if expected is not None and char not in expected:
+            raise ValueError(_("Expecting one of '%(expected)s' at "
+                               "'%(found)s'") %
+                             {'expected': expected, 'found': char})
+        self._pos += 1
+        return char
+
+    def _value(self):
+        def decode():
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._eof:
+                    raise
+                raise _NeedData()
+            # NOTE: a number or literal ending with the buffer may continue
+            # in the next chunk, the document always goes on after it. A
+            # number is also cut when it is followed by the start of its
+            # fraction or exponent ("1" of "1." is decoded as 1).
+            if not self._eof:
+                tail = end
+                if self._buf[self._pos] in '-0123456789':
+                    tail = _NUMBER_CHARS.match(self._buf, end).end()
+                if tail >= len(self._buf):
+                    raise _NeedData()
+            self._pos = end
+            return value
+
+        self._skip_whitespace()
+        return self._retry(decode)
+
+    def _parse(self):
+        self._next_char('{')
+        if self._next_char() == '}':
+            return
+        self._pos -= 1
+        while True:
+            key = self._value()
+            self._next_char(':')
+            self._skip_whitespace()
+            if (key == self.key and self._pos < len(self._buf) and
+                    self._buf[self._pos] == '['):
+                self._pos += 1
+                for element in self._parse_array():
+                    yield element
+            else:
+                self.rest[key] = self._value()
+            if self._next_char(',}') == '}':
+                return
+
+    def _parse_array(self):
+        if self._next_char() == ']':
+            return
+        self._pos -= 1
+        while True:
+            yield self._value()
+            if self._next_char(',]') == ']':
+                return
@@ -0,0 +1,133 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Connection pooling of the HTTP client.
+"""
+
+import socket
+import threading
+
+from requests import adapters
+from requests.packages.urllib3 import connection
+from requests.packages.urllib3 import connectionpool
+
+# Same defaults as requests
+DEFAULT_POOL_CONNECTIONS = adapters.DEFAULT_POOLSIZE
+DEFAULT_POOL_MAXSIZE = adapters.DEFAULT_POOLSIZE
+
+
+class PoolStats(object):
+    """Counters of the connections of a pool manager."""
+
+    def __init__(self):
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+        self._lock = threading.Lock()
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self):
+        with self._lock:
+            return {
+                'opened': self.opened,
+                'reused': self.reused,
+                'discarded': self.discarded,
+            }
+
+
+class _CountingPoolMixin(object):
+    stats = None
+
+    def _get_conn(self, timeout=None):
+        conn = super(_CountingPoolMixin, self)._get_conn(timeout=timeout)
+        # NOTE: new connections, and the pooled ones found closed by the
+        # server, connect when the request is sent
+        self.stats.incr('reused' if conn.sock is not None else 'opened')
+        return conn
+
+    def _put_conn(self, conn):
+        pool = self.pool
+        if conn is not None and (pool is None or pool.full()):
+            # NOTE: the pool closes the connections it cannot keep
+            self.stats.incr('discarded')
+        super(_CountingPoolMixin, self)._put_conn(conn)
+
+
+def _tcp_keepalive_options(idle):
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # NOTE: the name of the option differs between Linux and OS X
+    keepidle = (getattr(socket, 'TCP_KEEPIDLE', None) or
+                getattr(socket, 'TCP_KEEPALIVE', None))
+    if keepidle is not None:
+        options.append((socket.IPPROTO_TCP, keepidle, int(idle)))
+    return options
+
+
+class PoolingAdapter(adapters.HTTPAdapter):
+    """Transport adapter counting the connections of its pools.
+
+    :param pool_connections: number of hosts whose connections are pooled.
+    :param pool_maxsize: maximum number of connections kept per host.
+    :param pool_block: whether to wait for a free connection when
+        'pool_maxsize' connections to the host are in use, instead of
+        opening a connection that is discarded after the request.
+    :param keepalive: whether to reuse the connections; when False, every
+        request asks the server to close its connection.
+    :param tcp_keepalive: idle time (in seconds) after which TCP keep-alive
+        probes are sent on the connections, None to leave them disabled.
+    """
+
+    __attrs__ = adapters.HTTPAdapter.__attrs__ + ['keepalive',
+                                                  'tcp_keepalive']
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keepalive=True, tcp_keepalive=None):
+        self.pool_stats = PoolStats()
+        self.keepalive = keepalive
+        self.tcp_keepalive = tcp_keepalive
+        super(PoolingAdapter, self).__init__(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            pool_block=pool_block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.tcp_keepalive:
+            kwargs.setdefault('socket_options', (
+                connection.HTTPConnection.default_socket_options +
+                _tcp_keepalive_options(self.tcp_keepalive)))
+        super(PoolingAdapter, self).init_poolmanager(*args, **kwargs)
+        attrs = {'stats': self.pool_stats}
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('HTTPConnectionPool',
+                         (_CountingPoolMixin,
+                          connectionpool.HTTPConnectionPool), attrs),
+            'https': type('HTTPSConnectionPool',
+                          (_CountingPoolMixin,
+                           connectionpool.HTTPSConnectionPool), attrs),
+        }
+
+    def add_headers(self, request, **kwargs):
+        if not self.keepalive:
+            request.headers['Connection'] = 'close'
+
+    def __setstate__(self, state):
+        # NOTE: unpickled adapters rebuild their pool manager
+        self.pool_stats = PoolStats()
+        super(PoolingAdapter, self).__setstate__(state)
+
+    def stats(self):
+        """Return the number of connections opened, reused and discarded."""
+        return self.pool_stats.get()
@@ -0,0 +1,183 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Retry policies used by the HTTP clients.
+"""
+
+import random
+import threading
+
+from keystoneauth1 import exceptions as kexc
+from oslo_utils import uuidutils
+
+from iotronicclient import exc
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RETRY_INTERVAL = 2
+DEFAULT_BACKOFF = 2
+DEFAULT_MAX_INTERVAL = 10
+
+# Fraction of the requests that may be retried, and number of retries
+# that can be spent in a burst
+DEFAULT_BUDGET_RATIO = 0.2
+DEFAULT_BUDGET_BURST = 10
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+
+RETRY_EXCEPTIONS = (exc.Conflict, exc.ServiceUnavailable,
+                    exc.ConnectionRefused, kexc.RetriableConnectionFailure)
+
+# Errors telling that the server did not act on the request
+_NOT_PROCESSED_EXCEPTIONS = (exc.Conflict, exc.ServiceUnavailable,
+                             kexc.ConnectTimeout)
+
+
+def request_sent(error):
+    """Whether the request may have reached the server before 'error'.
+
+    The HTTP clients set the 'request_sent' attribute of the connection
+    errors they raise when they know that the connection could not even
+    be established.
+    """
+    return getattr(error, 'request_sent', True)
+
+
+class RetryBudget(object):
+    """Token bucket bounding the retries issued by a client.
+
+    Every request deposits 'ratio' tokens in the bucket, up to 'burst'
+    tokens, and every retry withdraws one. Once the bucket is empty the
+    failures are no longer retried, so when a server is overloaded the
+    retries add at most 'ratio' times the original load.
+    """
+
+    def __init__(self, ratio=DEFAULT_BUDGET_RATIO,
+                 burst=DEFAULT_BUDGET_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def acquire(self):
+        """Withdraw a retry from the budget, if any is left."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def available(self):
+        return int(self._tokens)
+
+
+class RetryPolicy(object):
+    """When and how long to wait before retrying a failed request.
+
+    The delay before retry N is drawn uniformly between 0 and
+    min(max_interval, interval * backoff ** (N - 1)) ("full jitter"), so
+    clients failing together do not come back together. When the server
+    sent a Retry-After header, the client waits at least that long.
+
+    :param max_retries: maximum number of retries of a request.
+    :param interval: base delay (in seconds) between retries.
+    :param backoff: multiplier applied to the delay after each retry, use
+        1 for a constant delay.
+    :param max_interval: cap (in seconds) of the delay, Retry-After aside.
+    :param jitter: whether to randomize the delays.
+    :param budget: :class:`RetryBudget` shared by all the requests of the
+        client, None for unlimited retries.
+    :param idempotency_keys: whether to send an Idempotency-Key header
+        with the non-idempotent requests (POST, PATCH). Only enable it
+        when the server deduplicates requests with this header: such
+        requests are then retried after any retriable error, including
+        the ones raised after the request was sent.
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES,
+                 interval=DEFAULT_RETRY_INTERVAL, backoff=DEFAULT_BACKOFF,
+                 max_interval=DEFAULT_MAX_INTERVAL, jitter=True,
+                 budget=None, idempotency_keys=False):
+        if max_retries is None:
+            max_retries = DEFAULT_MAX_RETRIES
+        if interval is None:
+            interval = DEFAULT_RETRY_INTERVAL
+        self.max_retries = max_retries
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max(max_interval, interval)
+        self.jitter = jitter
+        self.budget = budget
+        self.idempotency_keys = idempotency_keys
+
+    def idempotency_key(self, method):
+        """Return a new idempotency key for a request, if it needs one."""
+        if (self.idempotency_keys and
+                method.upper() not in IDEMPOTENT_METHODS):
+            return uuidutils.generate_uuid()
+
+    def is_retriable(self, method, error, idempotency_key=None):
+        """Whether a request failing with 'error' can be retried safely.
+
+        Idempotent requests, and the ones carrying an idempotency key, are
+        retried after any of the RETRY_EXCEPTIONS. Other requests are only
+        retried when the server did not act on them: it rejected them, or
+        they could not be sent at all.
+        """
+        if not isinstance(error, RETRY_EXCEPTIONS):
+            return False
+        if method.upper() in IDEMPOTENT_METHODS or idempotency_key:
+            return True
+        if isinstance(error, _NOT_PROCESSED_EXCEPTIONS):
+            return True
+        return not request_sent(error)
+
+    def record_request(self):
+        if self.budget is not None:
+            self.budget.record_request()
+
+    def allow_retry(self):
+        return self.budget is None or self.budget.acquire()
+
+    def get_delay(self, attempt, error=None):
+        """Return the time to wait after the failure of an attempt.
+
+        :param attempt: number of the attempt that failed, from 1.
+        :param error: the exception raised by the attempt.
+        """
+        delay = min(self.max_interval,
+                    self.interval * self.backoff ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        retry_after = getattr(error, 'retry_after', 0)
+        if retry_after:
+            # NOTE: the jittered delay still spreads the clients that were
+            # all told to come back at the same time
+            delay += retry_after
+        return delay
+
+
+def get_policy(max_retries=None, retry_interval=None, retry_policy=None):
+    """Return 'retry_policy', or the default one for the given settings.
+
+    Each default policy has its own :class:`RetryBudget`.
+    """
+    if retry_policy is not None:
+        return retry_policy
+    return RetryPolicy(max_retries=max_retries, interval=retry_interval,
+                       budget=RetryBudget())
@@ -44,6 +44,19 @@ class StateTransitionTimeout(ClientException):
     """Timed out while waiting for a requested provision state."""
 
 
+class DeadlineExceeded(ClientException):
+    """The call could not be completed before its deadline."""
+
+
+class CircuitOpen(ClientException):
+    """The circuit breaker of the endpoint is open, the call failed fast."""
+
+    def __init__(self, message=None, endpoint=None, retry_in=0):
+        super(CircuitOpen, self).__init__(message)
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
 def from_response(response, message=None, traceback=None, method=None,
                   url=None):
     """Return an HttpError instance based on response from httplib/requests."""
@@ -66,6 +79,9 @@ def from_response(response, message=None, traceback=None, method=None,
     if hasattr(response, 'status_code'):
         # NOTE(jiangfei): These modifications allow SessionClient
         # to handle faultstring.
-        response.json = lambda: {'error': error_body}
+        # NOTE: the error is given as decoded, instead of the body of the
+        # response being decoded again
+        return exceptions.from_response(response, method=method, url=url,
+                                        error=error_body)
 
     return exceptions.from_response(response, method=method, url=url)
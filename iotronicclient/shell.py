@@ -27,6 +27,7 @@ import sys
 from keystoneauth1.loading import session as kasession
 from oslo_utils import encodeutils
 from oslo_utils import importutils
+from oslo_utils import strutils
 import six
 
 import iotronicclient
@@ -72,6 +73,15 @@ class IotronicShell(object):
                             action='store_true',
                             help=_('Defaults to env[IOTRONICCLIENT_DEBUG]'))
 
+        parser.add_argument('--os-token-cache',
+                            default=strutils.bool_from_string(cliutils.env(
+                                'IOTRONICCLIENT_TOKEN_CACHE')),
+                            action='store_true',
+                            help=_('Keep the Keystone token in a file of the '
+                                   'user cache directory, and reuse it until '
+                                   'it expires. Defaults to '
+                                   'env[IOTRONICCLIENT_TOKEN_CACHE]'))
+
         parser.add_argument('--json',
                             default=False,
                             action='store_true',
@@ -228,8 +238,9 @@ class IotronicShell(object):
                                 'IOTRONIC_MAX_RETRIES',
                                 default=str(http.DEFAULT_MAX_RETRIES)))
 
-        msg = _('Amount of time (in seconds) between retries '
-                'in case of conflict error (HTTP 409). '
+        msg = _('Base amount of time (in seconds) between retries, '
+                'doubled after each retry, in case of conflict error '
+                '(HTTP 409). '
                 'Defaults to env[IOTRONIC_RETRY_INTERVAL] '
                 'or %d.') % http.DEFAULT_RETRY_INTERVAL
         parser.add_argument('--retry-interval', type=int, help=msg,
@@ -404,6 +415,7 @@ class IotronicShell(object):
         for key in client_args:
             kwargs[key] = getattr(args, key)
         kwargs['os_iotronic_api_version'] = os_iotronic_api_version
+        kwargs['token_cache'] = args.os_token_cache
         client = iotronicclient.client.get_client(api_major_version, **kwargs)
 
         try:
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+from oslotest import base
+
+from iotronicclient.common import jsonstream
+
+
+def _split(doc, size, offset):
+    """Cut doc in chunks of size bytes, after a first chunk of offset."""
+    return [doc[:offset]] + [doc[i:i + size]
+                             for i in range(offset, len(doc), size)]
+
+
+def _splits(doc):
+    for size in range(1, len(doc) + 1):
+        for offset in range(size):
+            yield _split(doc, size, offset)
+
+
+class ArrayStreamTest(base.BaseTestCase):
+
+    def _check(self, doc, key='boards'):
+        doc = doc.encode('utf-8')
+        expected = json.loads(doc.decode('utf-8'))
+        elements = expected.pop(key, [])
+        for chunks in _splits(doc):
+            stream = jsonstream.ArrayStream(chunks, key)
+            self.assertEqual(elements, list(stream), chunks)
+            self.assertEqual(expected, stream.rest, chunks)
+
+    def _check_invalid(self, doc, key='boards'):
+        doc = doc.encode('utf-8')
+        for chunks in _splits(doc):
+            stream = jsonstream.ArrayStream(chunks, key)
+            self.assertRaises(ValueError, list, stream)
+
+    def test_empty(self):
+        self._check(u'{}')
+        self._check(u'{"boards": []}')
+        self._check(u' { "boards" : [ ] } ')
+
+    def test_numbers(self):
+        self._check(u'{"boards": [0, 7, -12, 1.5, 12345, -0.25, 1e3, '
+                    u'2.5E-7, 6e+2, 10]}')
+
+    def test_literals(self):
+        self._check(u'{"boards": [true, false, null], "limit": null}')
+
+    def test_strings(self):
+        self._check(u'{"boards": ["", "plain", "a \\"quoted\\" \\\\ word", '
+                    u'"tab\\tnew\\nline", "\\u00e8\\ud83d\\ude00", '
+                    u'"Città 測試 \U0001f600"]}')
+
+    def test_nested_objects(self):
+        self._check(u'{"boards": [{"uuid": "1", "extra": {"a": [1, {"b": '
+                    u'[]}]}, "location": [{"x": 1.5}]}, {}, [[]]]}')
+
+    def test_next_before_array(self):
+        self._check(u'{"next": "http://localhost/v1/boards?marker=1", '
+                    u'"boards": [{"uuid": "1"}, {"uuid": "2"}]}')
+
+    def test_next_after_array(self):
+        self._check(u'{"boards": [{"uuid": "1"}, {"uuid": "2"}], '
+                    u'"next": "http://localhost/v1/boards?marker=2"}')
+
+    def test_other_arrays(self):
+        self._check(u'{"plugins": [1, 2], "boards": [3], "ports": []}')
+
+    def test_key_not_array(self):
+        doc = b'{"boards": {"uuid": "1"}, "limit": 2}'
+        for chunks in _splits(doc):
+            stream = jsonstream.ArrayStream(chunks, 'boards')
+            self.assertEqual([], list(stream))
+            self.assertEqual({'boards': {'uuid': '1'}, 'limit': 2},
+                             stream.rest)
+
+    def test_truncated(self):
+        doc = u'{"boards": [{"uuid": "1"}, 12, "x"], "next": "y"}'
+        for end in range(len(doc)):
+            self._check_invalid(doc[:end])
+
+    def test_invalid(self):
+        self._check_invalid(u'[1, 2]')
+        self._check_invalid(u'{"boards": [1 2]}')
+        self._check_invalid(u'{"boards": [1, 2}')
+        self._check_invalid(u'{"boards" [1, 2]}')
+        self._check_invalid(u'{"boards": [1, 2] "next": "x"}')
+        self._check_invalid(u'{"boards": [1, tru]}')
+        self._check_invalid(u'{"boards": ["open]}')
+
+    def test_invalid_utf8(self):
+        stream = jsonstream.ArrayStream([b'{"boards": ["\xff"]}'], 'boards')
+        self.assertRaises(ValueError, list, stream)
+
+    def test_close(self):
+        closed = []
+        stream = jsonstream.ArrayStream([b'{"boards": [1, 2]}'], 'boards',
+                                        close=lambda: closed.append(True))
+        iterator = iter(stream)
+        self.assertEqual(1, next(iterator))
+        self.assertEqual([], closed)
+        iterator.close()
+        self.assertEqual([True], closed)
+
+    def test_close_at_end(self):
+        closed = []
+        stream = jsonstream.ArrayStream([b'{"boards": [1]}'], 'boards',
+                                        close=lambda: closed.append(True))
+        self.assertEqual([1], list(stream))
+        self.assertEqual([True], closed)
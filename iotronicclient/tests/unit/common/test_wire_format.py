@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+
+from oslotest import base
+
+from iotronicclient.common import http
+from iotronicclient import exc
+from iotronicclient.tests.unit import utils
+
+BOARDS = {'boards': [{'uuid': '1', 'name': u'böard', 'extra': {}},
+                     {'uuid': '2', 'name': 'other', 'extra': {'a': 1.5}}],
+          'next': 'http://127.0.0.1/v1/boards?marker=2'}
+
+ERROR = {'error_message': {'faultstring': 'Board missing could not be found.',
+                           'debuginfo': 'Traceback'}}
+
+
+@testtools.skipIf(http.msgpack is None, 'msgpack is not installed')
+class WireFormatTest(base.BaseTestCase):
+
+    def _client(self, server, wire_format):
+        client = http.HTTPClient(server.endpoint,
+                                 os_iotronic_api_version='1.0',
+                                 wire_format=wire_format, max_retries=0)
+        self.addCleanup(client.session.close)
+        return client
+
+    def _get(self, wire_format, msgpack=True):
+        server = self.useFixture(utils.PageServer({'/v1/boards': BOARDS},
+                                                  ERROR, msgpack=msgpack))
+        client = self._client(server, wire_format)
+        return (server,) + client.json_request('GET', '/v1/boards')
+
+    def test_accept_json(self):
+        server, resp, body = self._get(None)
+        self.assertEqual('application/json', resp.headers['Content-Type'])
+        self.assertEqual(BOARDS, body)
+        self.assertEqual('application/json', server.requests[0][2]['Accept'])
+
+    def test_accept_msgpack(self):
+        server, resp, body = self._get('msgpack')
+        self.assertEqual(http.MSGPACK_CONTENT_TYPE,
+                         resp.headers['Content-Type'])
+        self.assertEqual(BOARDS, body)
+        self.assertEqual(http.get_accept_header('msgpack'),
+                         server.requests[0][2]['Accept'])
+
+    def test_json_fallback(self):
+        server, resp, body = self._get('msgpack', msgpack=False)
+        self.assertEqual('application/json', resp.headers['Content-Type'])
+        self.assertEqual(BOARDS, body)
+
+    def _check_error(self, wire_format, content_type):
+        server = self.useFixture(utils.PageServer({}, ERROR))
+        client = self._client(server, wire_format)
+        error = self.assertRaises(exc.NotFound, client.json_request,
+                                  'GET', '/v1/boards/missing')
+        self.assertIn('Board missing could not be found.', str(error))
+        self.assertEqual('Traceback', error.details)
+
+        resp = error.response
+        self.assertEqual(content_type, resp.headers['Content-Type'])
+        envelope = http.ErrorEnvelope.from_response(resp)
+        self.assertEqual('Board missing could not be found.',
+                         envelope.message)
+        self.assertEqual('Traceback', envelope.details)
+
+    def test_error_msgpack(self):
+        self._check_error('msgpack', http.MSGPACK_CONTENT_TYPE)
+
+    def test_error_json(self):
+        self._check_error(None, 'application/json')
+
+
+class ErrorEnvelopeTest(base.BaseTestCase):
+
+    def test_json_string(self):
+        body = ('{"error_message": "{\\"faultstring\\": \\"Bad\\", '
+                '\\"debuginfo\\": null}"}')
+        envelope = http.ErrorEnvelope(body, 'application/json')
+        self.assertEqual('Bad', envelope.message)
+        self.assertIsNone(envelope.details)
+
+    def test_description(self):
+        body = '{"error_message": {"description": "Bad"}}'
+        envelope = http.ErrorEnvelope(body, 'application/json')
+        self.assertEqual('Bad', envelope.message)
+
+    @testtools.skipIf(http.msgpack is None, 'msgpack is not installed')
+    def test_msgpack(self):
+        body = http.msgpack.packb(ERROR, use_bin_type=True)
+        envelope = http.ErrorEnvelope(body, http.MSGPACK_CONTENT_TYPE)
+        self.assertEqual('Board missing could not be found.',
+                         envelope.message)
+        self.assertEqual('Traceback', envelope.details)
+
+    @testtools.skipIf(http.msgpack is None, 'msgpack is not installed')
+    def test_msgpack_invalid(self):
+        envelope = http.ErrorEnvelope(b'\xc1', http.MSGPACK_CONTENT_TYPE)
+        self.assertIsNone(envelope.message)
+        self.assertIsNone(envelope.details)
+
+    def test_not_decoded(self):
+        envelope = http.ErrorEnvelope('<html>{"error_message": 1}</html>',
+                                      'text/html')
+        self.assertIsNone(envelope.message)
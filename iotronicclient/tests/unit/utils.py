@@ -0,0 +1,95 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+
+import fixtures
+from oslo_utils import importutils
+from six.moves import BaseHTTPServer
+
+msgpack = importutils.try_import('msgpack')
+
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+
+
+class _PageHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.command, self.path,
+                                dict(self.headers.items())))
+        if self.path not in server.pages:
+            status, doc = 404, server.error
+        else:
+            status, doc = 200, server.pages[self.path]
+        accept = self.headers.get('Accept') or ''
+        if (server.msgpack and msgpack is not None and
+                MSGPACK_CONTENT_TYPE in accept):
+            content_type = MSGPACK_CONTENT_TYPE
+            body = msgpack.packb(doc, use_bin_type=True)
+        else:
+            content_type = 'application/json'
+            body = json.dumps(doc).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PageServer(fixtures.Fixture):
+    """An HTTP server, in a thread, serving pages in JSON or MessagePack.
+
+    A page is answered in MessagePack when the Accept header of the
+    request asks for it, unless 'msgpack' is False, and in JSON otherwise.
+    The other paths are answered with a 404 holding 'error'.
+
+    :param pages: dict of the documents served, by path.
+    :param error: the document of the 404 responses.
+    :param msgpack: whether the server supports MessagePack.
+    """
+
+    def __init__(self, pages, error=None, msgpack=True):
+        super(PageServer, self).__init__()
+        self.pages = pages
+        self.error = error or {}
+        self.msgpack = msgpack
+
+    def _setUp(self):
+        # NOTE: the version is trimmed from the endpoint by stripping its
+        # characters, a port ending with '1' would be cut
+        servers = []
+        while True:
+            server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _PageHandler)
+            if not str(server.server_address[1]).endswith('1'):
+                break
+            servers.append(server)
+        for other in servers:
+            other.server_close()
+        server.pages = self.pages
+        server.error = self.error
+        server.msgpack = self.msgpack
+        server.requests = []
+        self.server = server
+        self.requests = server.requests
+        self.endpoint = 'http://127.0.0.1:%d/v1' % server.server_address[1]
+
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
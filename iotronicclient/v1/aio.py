@@ -0,0 +1,94 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+asyncio client for the Iotronic v1 API.
+
+The managers take the same arguments as the ones of
+:class:`iotronicclient.v1.client.Client`, but every call returns a
+coroutine, and the 'iter_*' methods return asynchronous generators::
+
+    async with aio.Client(endpoint, token=token) as client:
+        async for board in client.board.iter_list(limit=0):
+            ...
+"""
+
+from iotronicclient.common import aio
+from iotronicclient.common.i18n import _
+from iotronicclient import exc
+from iotronicclient.v1 import board
+from iotronicclient.v1 import client
+from iotronicclient.v1 import plugin
+from iotronicclient.v1 import plugin_injection
+
+
+class AsyncBoardManager(aio.AsyncCreateManagerMixin, board.BoardManager):
+    pass
+
+
+class AsyncPluginManager(aio.AsyncCreateManagerMixin, plugin.PluginManager):
+
+    def create_from_file(self, code, **kwargs):
+        raise exc.ValidationError(
+            _("Streaming the code of a plugin is not supported by the "
+              "asyncio client, use create()"))
+
+
+class AsyncInjectionPluginManager(aio.AsyncManagerMixin,
+                                  plugin_injection.InjectionPluginManager):
+    pass
+
+
+class Client(client.Client):
+    """asyncio client for the Iotronic v1 API.
+
+    :param string endpoint: A user-supplied endpoint URL for the iotronic
+                            service. Looked up in the catalog of 'session'
+                            if not given.
+    :param string token: Provides token for authentication.
+    :param session: Keystone session used to get the token (and the
+                    endpoint if not given).
+    :param integer timeout: Allows customization of the timeout for client
+                            http requests. (optional)
+    :param integer max_connections: The size of the connection pool shared
+                                    by all the requests. (optional)
+    """
+
+    def __init__(self, endpoint=None, session=None, service_type='iot',
+                 endpoint_type='publicURL', region_name=None, **kwargs):
+        """Initialize a new asyncio client for the Iotronic v1 API."""
+        if not endpoint and session:
+            endpoint = session.get_endpoint(service_type=service_type,
+                                            interface=endpoint_type,
+                                            region_name=region_name)
+        if not endpoint:
+            raise exc.EndpointException(
+                _("Must provide 'endpoint' or a keystone 'session'"))
+
+        self._select_api_version(endpoint, kwargs)
+
+        self.http_client = aio.AsyncHTTPClient(endpoint, session=session,
+                                               **kwargs)
+
+        self.board = AsyncBoardManager(self.http_client)
+        self.plugin = AsyncPluginManager(self.http_client)
+        self.plugin_injection = AsyncInjectionPluginManager(self.http_client)
+
+    async def close(self):
+        """Close the connections of the client."""
+        await self.http_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
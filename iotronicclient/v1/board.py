@@ -71,6 +71,49 @@ class BoardManager(base.CreateManager):
         if limit is not None:
             limit = int(limit)
 
+        path = self._list_path(status, marker, limit, detail, sort_key,
+                               sort_dir, fields, project)
+
+        if limit is None:
+            return self._list(self._path(path), "boards")
+        else:
+            return self._list_pagination(self._path(path), "boards",
+                                         limit=limit)
+
+    def iter_list(self, status=None, marker=None, limit=None,
+                  detail=False, sort_key=None, sort_dir=None, fields=None,
+                  project=None, prefetch=0, stream=False):
+        """Iterate over the boards, fetching one page at a time.
+
+        Takes the same arguments as :meth:`list`, except that a 'limit'
+        of None or 0 iterates over the entire list of boards. The 'next'
+        link of each page is only followed once the boards of the
+        current page have been consumed.
+
+        :param prefetch: Optional, the number of pages (1 to 3) to fetch
+                         in the background while the current page is
+                         consumed. 0 (the default) disables prefetching.
+
+        :param stream: Optional, whether to decode each page while it is
+                       received, yielding its first elements sooner and
+                       holding only one of them in memory. Can not be
+                       used with 'prefetch'.
+
+        :returns: A generator of boards.
+
+        """
+        if limit is not None:
+            limit = int(limit)
+
+        path = self._list_path(status, marker, limit, detail, sort_key,
+                               sort_dir, fields, project)
+
+        return self._iter_pagination(self._path(path), "boards",
+                                     limit=limit, prefetch=prefetch,
+                                     stream=stream)
+
+    def _list_path(self, status, marker, limit, detail, sort_key, sort_dir,
+                   fields, project):
         if detail and fields:
             raise exc.InvalidAttribute(_("Can't fetch a subset of fields "
                                          "with 'detail' set"))
@@ -87,12 +130,7 @@ class BoardManager(base.CreateManager):
             path += 'detail'
         if filters:
             path += '?' + '&'.join(filters)
-
-        if limit is None:
-            return self._list(self._path(path), "boards")
-        else:
-            return self._list_pagination(self._path(path), "boards",
-                                         limit=limit)
+        return path
 
     def get(self, board_id, fields=None):
         return self._get(resource_id=board_id, fields=fields)
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import six
+
 from iotronicclient.common import filecache
 from iotronicclient.common import http
 from iotronicclient.common.http import DEFAULT_VER
@@ -27,14 +29,30 @@ class Client(object):
     """Client for the Iotronic v1 API.
 
     :param string endpoint: A user-supplied endpoint URL for the iotronic
-                            service.
+                            service, or a list of the URLs of its replicas.
     :param function token: Provides token for authentication.
     :param integer timeout: Allows customization of the timeout for client
                             http requests. (optional)
+    :param integer connect_timeout: Timeout for establishing connections,
+                                    defaults to 'timeout'. (optional)
+    :param integer deadline: Maximum time a single call may take, including
+                             its retries. (optional)
     """
 
     def __init__(self, endpoint=None, *args, **kwargs):
         """Initialize a new client for the Iotronic v1 API."""
+        self._select_api_version(endpoint, kwargs)
+
+        self.http_client = http._construct_http_client(
+            endpoint, *args, **kwargs)
+
+        self.board = board.BoardManager(self.http_client)
+        self.plugin = plugin.PluginManager(self.http_client)
+        self.plugin_injection = plugin_injection.InjectionPluginManager(
+            self.http_client)
+
+    @staticmethod
+    def _select_api_version(endpoint, kwargs):
         if kwargs.get('os_iotronic_api_version'):
             kwargs['api_version_select_state'] = "user"
         else:
@@ -45,19 +63,18 @@ class Client(object):
 
             # If the user didn't specify a version, use a cached version if
             # one has been stored
-            host, netport = http.get_server(endpoint)
-            saved_version = filecache.retrieve_data(host=host, port=netport)
+            if isinstance(endpoint, six.string_types):
+                endpoint = [endpoint]
+            saved_version = None
+            for url in endpoint:
+                host, netport = http.get_server(url)
+                saved_version = filecache.retrieve_data(host=host,
+                                                        port=netport)
+                if saved_version:
+                    break
             if saved_version:
                 kwargs['api_version_select_state'] = "cached"
                 kwargs['os_iotronic_api_version'] = saved_version
             else:
                 kwargs['api_version_select_state'] = "default"
                 kwargs['os_iotronic_api_version'] = DEFAULT_VER
-
-        self.http_client = http._construct_http_client(
-            endpoint, *args, **kwargs)
-
-        self.board = board.BoardManager(self.http_client)
-        self.plugin = plugin.PluginManager(self.http_client)
-        self.plugin_injection = plugin_injection.InjectionPluginManager(
-            self.http_client)
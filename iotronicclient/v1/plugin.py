@@ -12,7 +12,10 @@
 
 import logging
 
+import six
+
 from iotronicclient.common import base
+from iotronicclient.common import http
 from iotronicclient.common.i18n import _
 from iotronicclient.common import utils
 from iotronicclient import exc
@@ -71,6 +74,50 @@ class PluginManager(base.CreateManager):
         if limit is not None:
             limit = int(limit)
 
+        path = self._list_path(marker, limit, detail, sort_key, sort_dir,
+                               fields, with_public, all_plugins)
+
+        if limit is None:
+            return self._list(self._path(path), "plugins")
+        else:
+            return self._list_pagination(self._path(path), "plugins",
+                                         limit=limit)
+
+    def iter_list(self, marker=None, limit=None,
+                  detail=False, sort_key=None, sort_dir=None, fields=None,
+                  with_public=False, all_plugins=False, prefetch=0,
+                  stream=False):
+        """Iterate over the plugins, fetching one page at a time.
+
+        Takes the same arguments as :meth:`list`, except that a 'limit'
+        of None or 0 iterates over the entire list of plugins. The 'next'
+        link of each page is only followed once the plugins of the
+        current page have been consumed.
+
+        :param prefetch: Optional, the number of pages (1 to 3) to fetch
+                         in the background while the current page is
+                         consumed. 0 (the default) disables prefetching.
+
+        :param stream: Optional, whether to decode each page while it is
+                       received, yielding its first elements sooner and
+                       holding only one of them in memory. Can not be
+                       used with 'prefetch'.
+
+        :returns: A generator of plugins.
+
+        """
+        if limit is not None:
+            limit = int(limit)
+
+        path = self._list_path(marker, limit, detail, sort_key, sort_dir,
+                               fields, with_public, all_plugins)
+
+        return self._iter_pagination(self._path(path), "plugins",
+                                     limit=limit, prefetch=prefetch,
+                                     stream=stream)
+
+    def _list_path(self, marker, limit, detail, sort_key, sort_dir, fields,
+                   with_public, all_plugins):
         if detail and fields:
             raise exc.InvalidAttribute(_("Can't fetch a subset of fields "
                                          "with 'detail' set"))
@@ -89,12 +136,7 @@ class PluginManager(base.CreateManager):
 
         if filters:
             path += '?' + '&'.join(filters)
-
-        if limit is None:
-            return self._list(self._path(path), "plugins")
-        else:
-            return self._list_pagination(self._path(path), "plugins",
-                                         limit=limit)
+        return path
 
     def get(self, plugin_id, fields=None):
         return self._get(resource_id=plugin_id, fields=fields)
@@ -105,3 +147,32 @@ class PluginManager(base.CreateManager):
     def update(self, plugin_id, patch, http_method='PATCH'):
         return self._update(resource_id=plugin_id, patch=patch,
                             method=http_method)
+
+    def create_from_file(self, code, **kwargs):
+        """Create a plugin, streaming its code from a file.
+
+        The creation request is the same as with :meth:`create`, but its
+        JSON body is encoded while it is sent, reading the code
+        http.CHUNKSIZE bytes at a time, instead of being held in memory
+        with the code.
+
+        :param code: the path of the UTF-8 file of the code, or the file
+                     opened in binary mode.
+        :param kwargs: the other attributes of the plugin, as for
+                       :meth:`create`.
+        :returns: The plugin created.
+        """
+        if 'code' in kwargs:
+            raise exc.InvalidAttribute(_("The code of the plugin is read "
+                                         "from the 'code' file"))
+        new = self._creation_body(kwargs)
+        if isinstance(code, six.string_types):
+            with open(code, 'rb') as fil:
+                return self._create_streamed(new, fil)
+        return self._create_streamed(new, code)
+
+    def _create_streamed(self, new, fil):
+        resp, body = self.api.json_request(
+            'POST', self._path(), body=http.JSONFileBody(new, 'code', fil))
+        if body:
+            return self.resource_class(self, body)
@@ -101,3 +101,45 @@ class InjectionPluginManager(base.Manager):
 
             return self._list_pagination(self._path(path), "injections",
                                          limit=limit)
+
+    def iter_plugins_on_board(self, board_ident, limit=None, detail=False,
+                              fields=None, prefetch=0,
+                              stream=False):
+        """Iterate over the plugins injected on a board, page by page.
+
+        :param board_ident: the UUID or name of the board.
+
+        :param limit: Optional, the maximum number of plugins to return.
+                      None or 0 iterates over the entire list.
+
+        :param detail: Optional, boolean whether to return detailed information
+                       about the plugins.
+
+        :param fields: Optional, a list with a specified set of fields
+                       of the resource to be returned. Can not be used
+                       when 'detail' is set.
+
+        :param prefetch: Optional, the number of pages (1 to 3) to fetch
+                         in the background while the current page is
+                         consumed. 0 (the default) disables prefetching.
+
+        :param stream: Optional, whether to decode each page while it is
+                       received, yielding its first elements sooner and
+                       holding only one of them in memory. Can not be
+                       used with 'prefetch'.
+
+        :returns: A generator of plugins injected on a board.
+
+        """
+        if limit is not None:
+            limit = int(limit)
+
+        if detail and fields:
+            raise exc.InvalidAttribute(_("Can't fetch a subset of fields "
+                                         "with 'detail' set"))
+
+        path = "%s/plugins" % board_ident
+
+        return self._iter_pagination(self._path(path), "injections",
+                                     limit=limit, prefetch=prefetch,
+                                     stream=stream)
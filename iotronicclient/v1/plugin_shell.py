@@ -167,21 +167,18 @@ def do_plugin_list(cc, args):
 def do_plugin_create(cc, args):
     """Register a new plugin with the Iotronic service."""
 
-    field_list = ['name', 'code', 'callable', 'public', 'extra']
+    field_list = ['name', 'callable', 'public', 'extra']
 
     fields = dict((k, v) for (k, v) in vars(args).items()
                   if k in field_list and not (v is None))
 
     fields = utils.args_array_to_dict(fields, 'extra')
 
-    fl = fields['code']
-    with open(fl, 'r') as fil:
-        fields['code'] = fil.read()
-
     if args.params:
         fields['parameters'] = utils.json_from_file(args.params)
 
-    plugin = cc.plugin.create(**fields)
+    # NOTE: the code is streamed from the file into the request body
+    plugin = cc.plugin.create_from_file(args.code, **fields)
 
     data = dict([(f, getattr(plugin, f, '')) for f in
                  res_fields.PLUGIN_DETAILED_RESOURCE.fields])